@@ -56,8 +56,27 @@ if [ ! -f ".env" ]; then
     echo "Copy .env.example to .env and configure as needed."
 fi
 
-# Start Flask server
-echo "Starting Flask API server..."
+# Start API server
 cd "$(dirname "$0")/.."
-python3 -c "from src.app import app; import os; app.run(host=os.getenv('API_HOST', 'localhost'), port=int(os.getenv('API_PORT', 8080)), debug=os.getenv('FLASK_DEBUG', 'False').lower() == 'true')"
+API_HOST=${API_HOST:-localhost}
+API_PORT=${API_PORT:-8080}
+if [ "$(echo "${FLASK_DEBUG:-False}" | tr '[:upper:]' '[:lower:]')" = "true" ]; then
+    echo "Starting Flask development server..."
+    python3 -c "from src.app import app; app.run(host='$API_HOST', port=$API_PORT, debug=True)"
+else
+    echo "Starting gunicorn API server..."
+    PRELOAD_FLAG=""
+    if [ "$(echo "${API_PRELOAD:-true}" | tr '[:upper:]' '[:lower:]')" = "true" ]; then
+        PRELOAD_FLAG="--preload"
+    fi
+    exec gunicorn \
+        --bind "$API_HOST:$API_PORT" \
+        --workers "${API_WORKERS:-2}" \
+        --worker-class gthread \
+        --threads "${API_THREADS:-4}" \
+        --keep-alive "${API_KEEP_ALIVE:-30}" \
+        --timeout "${API_TIMEOUT:-300}" \
+        $PRELOAD_FLAG \
+        wsgi:application
+fi
 
@@ -2,19 +2,43 @@
 Flask API Server
 RESTful API for embedding and querying documentation.
 """
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, Response, stream_with_context, make_response
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
+from decimal import Decimal
+import hashlib
+import logging
+import ollama
+import orjson
 import os
+import re
+import shutil
 import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial, singledispatch, wraps
 from pathlib import Path
+from typing import NamedTuple
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
+from langchain_core.documents import Document
 
 # Handle imports for both module and standalone execution
 if __name__ == '__main__':
-    from embed import embed_file, embed_directory, embed_confluence_page, embed_confluence_pages, import_confluence_page_to_vector_db
-    from query import query_docs, query_simple
-    from utils import setup_logging
+    from embed import embed_file, embed_directory, embed_confluence_page, embed_confluence_pages, import_confluence_page_to_vector_db, iter_embed_directory, STREAMABLE_FORMATS
+    from query import query_docs, query_simple, USE_CACHE
+    from get_vector_db import get_chroma_client, get_collection_count, invalidate_collection_count
+    from semantic_cache import get_semantic_cache, embed_query, SEMANTIC_CACHE_ENABLED
+    from cache import get_cache, get_response_cache
+    from embedding_cache import get_embedding_cache_stats
+    from monitoring import get_query_monitor, get_embedding_monitor
+    from tasks import get_task_manager
+    from utils import setup_logging, detect_document_format, generate_collection_name
     from settings import get_confluence_settings, save_confluence_settings, get_system_settings, save_system_settings, get_llm_providers, save_llm_providers, get_active_llm_provider, get_active_embedding_provider
     from llm_providers import LLMProviderFactory, EmbeddingProviderFactory
     from confluence import ConfluenceIntegration
@@ -24,13 +48,23 @@ if __name__ == '__main__':
     get_query_history = None
     requires_auth = lambda f: f  # No-op decorator
     requires_write_auth = lambda f: f
+    get_auth_status = None
+    verify_credentials = None
+    AUTH_STATUS = {}
+    extract_code_from_document = None
 else:
-    from .embed import embed_file, embed_directory, embed_confluence_page, embed_confluence_pages, import_confluence_page_to_vector_db
-    from .query import query_docs, query_simple
+    from .embed import embed_file, embed_directory, embed_confluence_page, embed_confluence_pages, import_confluence_page_to_vector_db, iter_embed_directory, STREAMABLE_FORMATS
+    from .query import query_docs, query_simple, USE_CACHE
+    from .get_vector_db import get_chroma_client, get_collection_count, invalidate_collection_count
+    from .semantic_cache import get_semantic_cache, embed_query, SEMANTIC_CACHE_ENABLED
+    from .cache import get_cache, get_response_cache
+    from .embedding_cache import get_embedding_cache_stats
+    from .monitoring import get_query_monitor, get_embedding_monitor
+    from .tasks import get_task_manager
     from .multi_version_query import query_multiple_versions, compare_versions
     from .query_history import get_query_history
-    from .utils import setup_logging
-    from .auth import requires_auth, requires_write_auth, get_auth_status
+    from .utils import setup_logging, detect_document_format, generate_collection_name
+    from .auth import requires_auth, requires_write_auth, get_auth_status, verify_credentials, AUTH_CONFIG_STATUS as AUTH_STATUS
     from .code_extractor import extract_code_from_document, format_code_for_response
     from .settings import get_confluence_settings, save_confluence_settings, get_system_settings, save_system_settings, get_llm_providers, save_llm_providers, get_active_llm_provider, get_active_embedding_provider
     from .llm_providers import LLMProviderFactory, EmbeddingProviderFactory
@@ -38,47 +72,277 @@ else:
 
 load_dotenv()
 
+
+@dataclass(frozen=True)
+class Config:
+    """API server configuration, read from the environment once at import."""
+    secret_key: str
+    session_secure: bool
+    temp_dir: Path
+    max_upload_bytes: int
+    max_body_bytes: int
+    compress_level: int
+    compress_min_size: int
+    health_check_ttl: float
+    health_probe_timeout: float
+    chroma_path: str
+    collection_name: str
+    host: str
+    port: int
+    debug: bool
+    workers: int
+    threads: int
+    keep_alive: int
+    timeout: int
+    preload: bool
+    
+    @classmethod
+    def from_env(cls) -> 'Config':
+        """Build a Config from environment variables (and .env)."""
+        return cls(
+            secret_key=os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production'),
+            session_secure=os.getenv('SESSION_SECURE', 'false').lower() == 'true',
+            temp_dir=Path(os.getenv('TEMP_FOLDER', './_temp')),
+            max_upload_bytes=int(os.getenv('MAX_UPLOAD_MB', 200)) * 1024 * 1024,
+            # Limit for everything that is not a multipart file upload (JSON bodies, forms)
+            max_body_bytes=int(os.getenv('MAX_BODY_BYTES', 1024 * 1024)),
+            # Level 4 compresses JSON well at a fraction of the CPU of gzip's default 6
+            compress_level=int(os.getenv('COMPRESS_LEVEL', 4)),
+            compress_min_size=int(os.getenv('COMPRESS_MIN_SIZE', 512)),
+            # Seconds a health probe result stays valid; load balancers poll
+            # /health far more often than the provider configuration changes
+            health_check_ttl=float(os.getenv('HEALTH_CHECK_TTL', 30)),
+            health_probe_timeout=float(os.getenv('HEALTH_PROBE_TIMEOUT', 0.5)),
+            chroma_path=os.getenv('CHROMA_PATH', 'chroma'),
+            collection_name=os.getenv('COLLECTION_NAME', 'common-model-docs'),
+            host=os.getenv('API_HOST', 'localhost'),
+            port=int(os.getenv('API_PORT', 8080)),
+            debug=os.getenv('FLASK_DEBUG', 'False').lower() == 'true',
+            workers=int(os.getenv('API_WORKERS', 2)),
+            threads=int(os.getenv('API_THREADS', 4)),
+            keep_alive=int(os.getenv('API_KEEP_ALIVE', 30)),
+            timeout=int(os.getenv('API_TIMEOUT', 300)),
+            preload=os.getenv('API_PRELOAD', 'true').lower() == 'true',
+        )
+
+
+CONFIG = Config.from_env()
+
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson."""
+    
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        if hasattr(obj, '__html__'):
+            return str(obj.__html__())
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self._default, option=self.options).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self._default, option=self.options)
+        return self._app.response_class(body, mimetype='application/json')
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 # Configure session
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+app.config['SECRET_KEY'] = CONFIG.secret_key
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-app.config['SESSION_COOKIE_SECURE'] = os.getenv('SESSION_SECURE', 'false').lower() == 'true'
+app.config['SESSION_COOKIE_SECURE'] = CONFIG.session_secure
+# Reject oversized request bodies before they are read
+app.config['MAX_CONTENT_LENGTH'] = CONFIG.max_upload_bytes
 
 # Enable CORS with credentials support for session cookies
 CORS(app, supports_credentials=True)
 
-# Ensure temp directory exists
-TEMP_DIR = Path(os.getenv('TEMP_FOLDER', './_temp'))
-TEMP_DIR.mkdir(parents=True, exist_ok=True)
+class _Compress(Compress):
+    """Compress, except for live progress streams that must reach the client line by line."""
+    
+    def after_request(self, response):
+        # Streaming compressors only flush at the end, which would hold back every progress line
+        if response.is_streamed and response.headers.get('X-Accel-Buffering') == 'no':
+            return response
+        return super().after_request(response)
+
+
+# Compress API responses for clients that accept it (Brotli preferred); tiny bodies aren't worth it
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_ALGORITHM_STREAMING'] = ['br', 'gzip']
+app.config['COMPRESS_LEVEL'] = CONFIG.compress_level
+app.config['COMPRESS_BR_LEVEL'] = CONFIG.compress_level
+app.config['COMPRESS_MIN_SIZE'] = CONFIG.compress_min_size
+app.config['COMPRESS_MIMETYPES'] = [
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain'
+]
+_Compress(app)
+
+# Ensure temp directory exists; uploads are checked against its resolved path
+CONFIG.temp_dir.mkdir(parents=True, exist_ok=True)
+TEMP_DIR_RESOLVED = CONFIG.temp_dir.resolve()
 
 logger = setup_logging()
 
+# Counts collections in parallel for /collections; threads start on first use
+_collection_count_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='collection-count')
+_history_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='history')
+# Reads the monitoring logs and caches for /stats concurrently
+_stats_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='stats')
 
-@app.route('/health', methods=['GET'])
-def health():
-    """Health check endpoint."""
-    try:
-        # Check if configured LLM provider is accessible
+_llm_health = {'available': None, 'provider': 'unknown', 'checked_at': 0.0}
+_llm_health_lock = threading.Lock()
+
+
+def _get_llm_health():
+    """
+    Return cached LLM provider availability, re-probing once the TTL expires.
+    
+    Returns:
+        tuple: (llm_available, llm_provider)
+    """
+    now = time.monotonic()
+    if _llm_health['available'] is not None and now - _llm_health['checked_at'] < CONFIG.health_check_ttl:
+        return _llm_health['available'], _llm_health['provider']
+    
+    with _llm_health_lock:
+        # Another thread may have refreshed the probe while we waited
+        if _llm_health['available'] is not None and now - _llm_health['checked_at'] < CONFIG.health_check_ttl:
+            return _llm_health['available'], _llm_health['provider']
+        
         try:
             provider_config = get_active_llm_provider()
-            llm = LLMProviderFactory.get_llm(provider_config['type'], provider_config)
-            llm_available = True
-            llm_provider = provider_config['type']
+            if provider_config['type'] == 'ollama':
+                # Ask the server for its model list instead of building a chat client,
+                # so an unreachable Ollama is reported as unavailable within the timeout
+                base_url = provider_config.get('base_url', os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434'))
+                ollama.Client(host=base_url, timeout=CONFIG.health_probe_timeout).list()
+            else:
+                LLMProviderFactory.get_llm(provider_config['type'], provider_config)
+            available = True
+            provider = provider_config['type']
         except Exception as e:
-            llm_available = False
-            llm_provider = 'unknown'
+            available = False
+            provider = 'unknown'
             logger.warning(f"LLM provider check failed: {e}")
         
-        # Include auth status if available
-        auth_status = {}
-        try:
-            if 'get_auth_status' in globals() and get_auth_status:
-                auth_status = get_auth_status()
-        except Exception:
-            # Gracefully handle any errors when retrieving auth status
-            # This allows the health check to continue even if auth status is unavailable
-            pass
+        _llm_health.update(available=available, provider=provider, checked_at=time.monotonic())
+        return available, provider
+
+
+class InvalidQueryArgument(ValueError):
+    """Raised when a query-string parameter cannot be converted to its declared type."""
+
+
+class StatsArgs(NamedTuple):
+    days: int = 7
+
+
+class HistoryArgs(NamedTuple):
+    limit: int = 50
+    offset: int = 0
+
+
+class HistorySearchArgs(NamedTuple):
+    q: str = ''
+    limit: int = 20
+
+
+class DocumentsArgs(NamedTuple):
+    limit: int = 0  # 0 returns every document
+    offset: int = 0
+    format: str = 'json'  # 'json' or 'ndjson'
+
+
+class ConfluenceFetchArgs(NamedTuple):
+    verbose: int = 0  # 1 returns full error messages
+
+
+def parse_query_args(schema):
+    """
+    Parse the current request's query string into a typed argument tuple.
+    
+    Args:
+        schema: NamedTuple class whose annotations give each parameter's type
+            and whose defaults apply to missing parameters
+    
+    Returns:
+        Instance of schema
+    
+    Raises:
+        InvalidQueryArgument: If a parameter cannot be converted
+    """
+    values = {}
+    for name, type_ in schema.__annotations__.items():
+        raw = request.args.get(name)
+        if raw is not None:
+            try:
+                values[name] = type_(raw)
+            except ValueError:
+                raise InvalidQueryArgument(f"Invalid value for '{name}': {raw!r}")
+    return schema(**values)
+
+
+@app.errorhandler(InvalidQueryArgument)
+def handle_invalid_query_argument(e):
+    return jsonify({"error": str(e)}), 400
+
+
+@app.before_request
+def limit_request_body():
+    """Apply the small body limit to non-upload requests so oversized JSON is rejected unread."""
+    if request.mimetype != 'multipart/form-data':
+        request.max_content_length = CONFIG.max_body_bytes
+
+
+@app.errorhandler(413)
+def handle_request_too_large(e):
+    return jsonify({"error": f"Request body exceeds {request.max_content_length / (1024 * 1024):g} MB limit"}), 413
+
+
+try:
+    from xxhash import xxh3_64_hexdigest as _body_digest
+except ImportError:
+    def _body_digest(body: bytes) -> str:
+        return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def conditional_get(view):
+    """
+    Add a weak ETag to successful GET responses and answer matching
+    If-None-Match requests with 304 Not Modified.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if request.method == 'GET' and response.status_code == 200 and not response.is_streamed:
+            response.set_etag(_body_digest(response.get_data()), weak=True)
+            return response.make_conditional(request)
+        return response
+    return wrapper
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Health check endpoint."""
+    try:
+        # Check if configured LLM provider is accessible (cached for CONFIG.health_check_ttl)
+        llm_available, llm_provider = _get_llm_health()
         
         response = {
             "status": "healthy" if llm_available else "degraded",
@@ -86,7 +350,8 @@ def health():
             "llm_available": llm_available,
             "llm_provider": llm_provider
         }
-        response.update(auth_status)
+        # Auth configuration is fixed at import; per-session state is served by /auth/status
+        response.update(AUTH_STATUS)
         
         status_code = 200 if llm_available else 503
         return jsonify(response), status_code
@@ -99,6 +364,39 @@ def health():
         }), 503
 
 
+def _save_upload(file, file_path: Path):
+    """Save an uploaded file with a large copy buffer; it is read back sequentially."""
+    with open(file_path, 'wb') as fh:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        shutil.copyfileobj(file.stream, fh, length=1024 * 1024)
+    logger.info(f"File saved: {file_path}")
+
+
+def _embed_saved_upload(file_path: Path, filename: str, version, overwrite: bool):
+    """
+    Embed an upload saved by an async /embed request, then remove its temporary directory.
+    
+    Returns:
+        dict: Same payload a synchronous /embed returns
+    """
+    try:
+        if detect_document_format(filename) in STREAMABLE_FORMATS:
+            # Load from the stream so metadata matches a synchronous upload
+            with open(file_path, 'rb') as fh:
+                embed_file(fh, version=version, overwrite=overwrite, filename=filename)
+        else:
+            embed_file(str(file_path), version=version, overwrite=overwrite)
+        return {
+            "message": "File embedded successfully",
+            "version": version,
+            "mode": "overwrite" if overwrite else "incremental",
+            "filename": filename
+        }
+    finally:
+        shutil.rmtree(file_path.parent, ignore_errors=True)
+
+
 @app.route('/embed', methods=['POST'])
 @requires_write_auth
 def embed():
@@ -112,34 +410,49 @@ def embed():
     
     version = request.form.get('version')  # Optional version parameter
     overwrite = request.form.get('overwrite', 'false').lower() == 'true'
+    run_async = request.form.get('async', 'false').lower() == 'true'
     
     # SECURITY: Sanitize filename to prevent path traversal attacks
     safe_filename = secure_filename(file.filename)
     if not safe_filename:
         return jsonify({"error": "Invalid filename"}), 400
     
-    # Use absolute path to ensure we stay within TEMP_DIR
-    file_path = TEMP_DIR / safe_filename
-    
-    # Additional security: Ensure resolved path is still within TEMP_DIR
-    try:
-        file_path = file_path.resolve()
-        if not str(file_path).startswith(str(TEMP_DIR.resolve())):
-            return jsonify({"error": "Invalid file path"}), 400
-    except (OSError, ValueError):
-        return jsonify({"error": "Invalid file path"}), 400
-    
-    # Save file
-    try:
-        file.save(str(file_path))
-        logger.info(f"File saved: {file_path}")
-    except Exception as e:
-        logger.error(f"Error saving file: {e}")
-        return jsonify({"error": f"Failed to save file: {str(e)}"}), 500
+    if run_async:
+        # Save under a per-task directory so concurrent uploads of the same name don't collide
+        file_path = TEMP_DIR_RESOLVED / uuid.uuid4().hex / safe_filename
+        try:
+            file_path.parent.mkdir(parents=True)
+            _save_upload(file, file_path)
+        except Exception as e:
+            logger.error(f"Error saving file: {e}")
+            shutil.rmtree(file_path.parent, ignore_errors=True)
+            return jsonify({"error": f"Failed to save file: {str(e)}"}), 500
+        
+        task_id = get_task_manager().submit('embed', _embed_saved_upload, file_path, safe_filename, version, overwrite)
+        return jsonify({
+            "message": "File queued for embedding",
+            "task_id": task_id,
+            "status_url": f"/tasks/{task_id}",
+            "filename": safe_filename
+        }), 202
     
     try:
-        # Embed with version support and incremental update capability
-        embed_file(str(file_path), version=version, overwrite=overwrite)
+        if detect_document_format(safe_filename) in STREAMABLE_FORMATS:
+            # Parsed straight from the upload, without touching the disk
+            file.stream.seek(0)
+            embed_file(file.stream, version=version, overwrite=overwrite, filename=safe_filename)
+        else:
+            # The loader needs a path; a private directory keeps concurrent uploads of the
+            # same name apart and is removed on exit. secure_filename() leaves no separators,
+            # so the joined path cannot escape it.
+            with tempfile.TemporaryDirectory(dir=TEMP_DIR_RESOLVED) as tmp_dir:
+                file_path = Path(tmp_dir) / safe_filename
+                try:
+                    _save_upload(file, file_path)
+                except Exception as e:
+                    logger.error(f"Error saving file: {e}")
+                    return jsonify({"error": f"Failed to save file: {str(e)}"}), 500
+                embed_file(str(file_path), version=version, overwrite=overwrite)
         return jsonify({
             "message": "File embedded successfully",
             "version": version,
@@ -149,14 +462,6 @@ def embed():
     except Exception as e:
         logger.error(f"Embedding failed: {e}")
         return jsonify({"error": f"Embedding failed: {str(e)}"}), 500
-    finally:
-        # Clean up temporary file
-        try:
-            if file_path.exists():
-                file_path.unlink()
-                logger.info(f"Cleaned up temporary file: {file_path}")
-        except Exception as e:
-            logger.warning(f"Failed to clean up temporary file: {e}")
 
 
 @app.route('/embed-batch', methods=['POST'])
@@ -169,6 +474,8 @@ def embed_batch():
     directory_path = request.form.get('directory')
     version = request.form.get('version')
     overwrite = request.form.get('overwrite', 'false').lower() == 'true'
+    stream = request.form.get('stream', 'false').lower() == 'true'
+    run_async = request.form.get('async', 'false').lower() == 'true'
     
     # SECURITY: Validate directory path
     try:
@@ -179,6 +486,31 @@ def embed_batch():
     except (OSError, ValueError) as e:
         return jsonify({"error": f"Invalid directory path: {str(e)}"}), 400
     
+    if stream:
+        # One NDJSON line per file as it finishes, then a summary line
+        def generate():
+            succeeded = failed = 0
+            for result in iter_embed_directory(str(directory_path), version=version):
+                if result['success']:
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield orjson.dumps(result) + b"\n"
+            yield orjson.dumps({"done": True, "success": succeeded, "failed": failed, "version": version}) + b"\n"
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                        headers={'X-Accel-Buffering': 'no'})
+    
+    if run_async:
+        task_id = get_task_manager().submit('embed-batch', embed_directory, str(directory_path),
+                                            version=version, overwrite=overwrite)
+        return jsonify({
+            "message": "Batch embedding queued",
+            "task_id": task_id,
+            "status_url": f"/tasks/{task_id}",
+            "version": version
+        }), 202
+    
     try:
         results = embed_directory(
             str(directory_path),
@@ -195,21 +527,26 @@ def embed_batch():
         return jsonify({"error": f"Batch embedding failed: {str(e)}"}), 500
 
 
+@app.route('/tasks/<task_id>', methods=['GET'])
+@requires_auth
+def get_task(task_id):
+    """Get the status of a background task started with async=true."""
+    task = get_task_manager().get(task_id)
+    if task is None:
+        return jsonify({"error": f"Task {task_id} not found"}), 404
+    return jsonify(task), 200
+
+
 @app.route('/query', methods=['POST'])
 def query():
     """Query the documentation using natural language."""
-    import time
-    
     # Start overall request timing
     request_start_time = time.time()
     
     # SECURITY: Check if request has JSON body
-    if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
-    
-    data = request.json
-    if data is None:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
     
     question = data.get('query')
     if not question:
@@ -221,6 +558,54 @@ def query():
     k = data.get('k', 3)  # Number of documents to retrieve
     use_simple = data.get('simple', False)  # Use simple query (faster)
     
+    # Exact-match cache: repeated questions skip embedding, retrieval and the LLM
+    response_cache = get_response_cache() if USE_CACHE else None
+    cached_response = None
+    if response_cache is not None:
+        response_cache_key = response_cache.make_key(question, collection_name, version, k, bool(use_simple))
+        cached_response = response_cache.get(response_cache_key)
+    if cached_response is not None:
+        request_total_time = time.time() - request_start_time
+        response = {
+            **cached_response,
+            "query": question,
+            "stats": {
+                'cache_hit': True,
+                'total_time': request_total_time,
+                'request_total_time': request_total_time
+            }
+        }
+        logger.info(f"Response cache hit for '{question[:50]}...' in {request_total_time:.3f}s")
+        _add_to_history(question, response['answer'], version, request_total_time, response['source_count'])
+        return jsonify(response), 200
+    
+    # Semantic cache: answer paraphrases of recent questions without retrieval/LLM
+    semantic_cache = get_semantic_cache() if SEMANTIC_CACHE_ENABLED and USE_CACHE else None
+    cache_context = f"{collection_name}|{version}|{k}|{bool(use_simple)}"
+    query_embedding = None
+    if semantic_cache is not None:
+        try:
+            query_embedding = embed_query(question)
+            cached_response = semantic_cache.get(query_embedding, cache_context)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            cached_response = None
+        
+        if cached_response is not None:
+            request_total_time = time.time() - request_start_time
+            response = {
+                **cached_response,
+                "query": question,
+                "stats": {
+                    'semantic_cache_hit': True,
+                    'total_time': request_total_time,
+                    'request_total_time': request_total_time
+                }
+            }
+            logger.info(f"Semantic cache hit for '{question[:50]}...' in {request_total_time:.3f}s")
+            _add_to_history(question, response['answer'], version, request_total_time, response['source_count'])
+            return jsonify(response), 200
+    
     try:
         if use_simple:
             result = query_simple(question, collection_name, version, k)
@@ -228,24 +613,10 @@ def query():
             result = query_docs(question, collection_name, version, k)
         
         # Format response - convert Document objects to dicts for JSON serialization
-        sources = []
-        for doc in result.get('source_documents', []):
-            if hasattr(doc, 'page_content'):
-                sources.append({
-                    "content": doc.page_content[:500] if doc.page_content else "",  # First 500 chars
-                    "metadata": doc.metadata if hasattr(doc, 'metadata') else {}
-                })
-            elif isinstance(doc, dict):
-                sources.append({
-                    "content": doc.get('page_content', doc.get('content', ''))[:500],
-                    "metadata": doc.get('metadata', {})
-                })
-            else:
-                # Fallback: convert to string representation
-                sources.append({
-                    "content": str(doc)[:500],
-                    "metadata": {}
-                })
+        sources = [
+            {"content": _snippet(content), "metadata": metadata}
+            for content, metadata in map(_as_pair, result.get('source_documents', []))
+        ]
         
         # Get statistics from result
         stats = result.get('stats', {})
@@ -263,30 +634,24 @@ def query():
             "stats": stats
         }
         
-        # Log statistics
-        logger.info(f"Query statistics for '{question[:50]}...': "
-                   f"Total: {stats.get('request_total_time', 0):.3f}s | "
-                   f"Cache lookup: {stats.get('cache_lookup_time', 0):.3f}s | "
-                   f"LLM init: {stats.get('llm_init_time', 0):.3f}s | "
-                   f"Vector DB init: {stats.get('vector_db_init_time', 0):.3f}s | "
-                   f"Multi-query gen: {stats.get('multi_query_generation_time', 0):.3f}s | "
-                   f"Doc retrieval: {stats.get('document_retrieval_time', 0):.3f}s | "
-                   f"Answer gen: {stats.get('answer_generation_time', 0):.3f}s | "
-                   f"Cache store: {stats.get('cache_store_time', 0):.3f}s | "
-                   f"Overhead: {stats.get('request_overhead_time', 0):.3f}s")
+        cacheable_response = {
+            "answer": response['answer'],
+            "sources": sources,
+            "source_count": len(sources)
+        }
+        if response_cache is not None:
+            response_cache.set(response_cache_key, cacheable_response)
+        if semantic_cache is not None and query_embedding is not None:
+            semantic_cache.set(query_embedding, cacheable_response, cache_context)
+        
+        # Log statistics as one JSON object; skipped entirely unless INFO is enabled
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Query statistics: %s", app.json.dumps({"query": question[:50], **stats}),
+                        extra={"query_stats": stats})
         
         # Add to query history
-        try:
-            history = get_query_history()
-            history.add_query(
-                question,
-                answer=result['result'],
-                version=version,
-                response_time=stats.get('request_total_time'),
-                source_count=len(result['source_documents'])
-            )
-        except Exception as e:
-            logger.warning(f"Failed to add query to history: {e}")
+        _add_to_history(question, response['answer'], version,
+                        stats.get('request_total_time'), len(sources))
         
         return jsonify(response), 200
     except ValueError as e:
@@ -296,20 +661,85 @@ def query():
         return jsonify({"error": f"Query failed: {str(e)}"}), 500
 
 
+# Characters of each source document included in /query responses
+SOURCE_SNIPPET_CHARS = 500
+ERROR_SNIPPET_CHARS = 200  # Per-page error messages in the /confluence/fetch summary
+
+
+def _snippet(content, length: int = SOURCE_SNIPPET_CHARS) -> str:
+    """Return the first length characters of content, stringifying only non-str values."""
+    if isinstance(content, str):
+        return content[:length]
+    if content is None:
+        return ""
+    return str(content)[:length]
+
+
+@singledispatch
+def _as_pair(doc):
+    """
+    Normalize a source document to a (content, metadata) pair.
+    
+    Content is returned as-is; _snippet() truncates it, so strings are sliced
+    rather than copied in full.
+    
+    Args:
+        doc: Document, dict, or any other object returned by a retriever
+    
+    Returns:
+        tuple: (content, metadata dict)
+    """
+    if hasattr(doc, 'page_content'):
+        return doc.page_content, getattr(doc, 'metadata', {})
+    # Fallback: the object itself, stringified by _snippet()
+    return doc, {}
+
+
+@_as_pair.register
+def _(doc: Document):
+    return doc.page_content, doc.metadata
+
+
+@_as_pair.register
+def _(doc: dict):
+    return doc.get('page_content', doc.get('content', '')), doc.get('metadata', {})
+
+
+def _record_history(question, answer, version, response_time, source_count):
+    """Write a query to history, logging rather than raising on errors."""
+    try:
+        history = get_query_history()
+        history.add_query(
+            question,
+            answer=answer,
+            version=version,
+            response_time=response_time,
+            source_count=source_count
+        )
+    except Exception as e:
+        logger.warning(f"Failed to add query to history: {e}")
+
+
+def _add_to_history(question, answer, version, response_time, source_count):
+    """Record a query in history off the request thread."""
+    # A single worker keeps entries in submission order
+    _history_executor.submit(_record_history, question, answer, version, response_time, source_count)
+
+
 @app.route('/collections', methods=['GET'])
+@conditional_get
 def list_collections():
     """List all available collections."""
     try:
-        import chromadb
-        client = chromadb.PersistentClient(path=os.getenv('CHROMA_PATH', 'chroma'))
+        client = get_chroma_client()
         collections = client.list_collections()
         
-        collection_info = []
-        for collection in collections:
-            collection_info.append({
-                "name": collection.name,
-                "count": collection.count()
-            })
+        # Counts are cached per collection; misses are separate store queries, so issue them concurrently
+        counts = _collection_count_executor.map(get_collection_count, collections)
+        collection_info = [
+            {"name": collection.name, "count": count}
+            for collection, count in zip(collections, counts)
+        ]
         
         return jsonify({
             "collections": collection_info,
@@ -320,40 +750,48 @@ def list_collections():
         return jsonify({"error": f"Failed to list collections: {str(e)}"}), 500
 
 
+# Page size used when reading collection listings from Chroma
+DOCUMENTS_PAGE_SIZE = 10000
+
+# Path segments made only of digits and dots are version numbers, not collection names
+_VERSION_RE = re.compile(r'^[\d.]+\Z')
+
+
+def _resolve_collection(client, version):
+    """
+    Resolve a /collections/<version> path segment to a Chroma collection.
+    
+    Version numbers map to the versioned collection name; anything else is
+    tried as a full collection name first, then as a version suffix.
+    
+    Args:
+        client: Chroma client
+        version: Version number or full collection name
+    
+    Returns:
+        tuple: (collection, collection_name)
+    
+    Raises:
+        Exception: If no matching collection exists
+    """
+    if not _VERSION_RE.match(version):
+        try:
+            return client.get_collection(name=version), version
+        except Exception:
+            pass
+    collection_name = generate_collection_name(CONFIG.collection_name, version)
+    return client.get_collection(name=collection_name), collection_name
+
+
 @app.route('/collections/<version>', methods=['GET'])
 def get_collection_info(version):
     """Get information about a specific collection."""
     try:
-        import chromadb
-        from .utils import generate_collection_name
-        import re
-        
-        client = chromadb.PersistentClient(path=os.getenv('CHROMA_PATH', 'chroma'))
-        base_name = os.getenv('COLLECTION_NAME', 'common-model-docs')
-        
-        # Try to determine if version is actually a version number or a full collection name
-        collection_name = None
-        collection = None
-        
-        # Check if version looks like a version number (contains digits)
-        if re.match(r'^[\d.]+$', version):
-            # It's a version number, use versioned collection name
-            collection_name = generate_collection_name(base_name, version)
-        else:
-            # It might be a full collection name, try as-is first
-            try:
-                collection = client.get_collection(name=version)
-                collection_name = version
-            except Exception:
-                # If that fails, try with version suffix
-                collection_name = generate_collection_name(base_name, version)
-        
-        if not collection:
-            collection = client.get_collection(name=collection_name)
+        collection, _ = _resolve_collection(get_chroma_client(), version)
         
         return jsonify({
             "name": collection.name,
-            "count": collection.count(),
+            "count": get_collection_count(collection),
             "version": version
         }), 200
     except Exception as e:
@@ -366,31 +804,11 @@ def get_collection_info(version):
 def delete_collection(version):
     """Delete a specific collection."""
     try:
-        import chromadb
-        from .utils import generate_collection_name
-        import re
-        
-        client = chromadb.PersistentClient(path=os.getenv('CHROMA_PATH', 'chroma'))
-        base_name = os.getenv('COLLECTION_NAME', 'common-model-docs')
-        
-        # Try to determine if version is actually a version number or a full collection name
-        collection_name = None
-        
-        # Check if version looks like a version number (contains digits)
-        if re.match(r'^[\d.]+$', version):
-            # It's a version number, use versioned collection name
-            collection_name = generate_collection_name(base_name, version)
-        else:
-            # It might be a full collection name, try as-is first
-            try:
-                # Try to get the collection to verify it exists
-                client.get_collection(name=version)
-                collection_name = version
-            except Exception:
-                # If that fails, try with version suffix
-                collection_name = generate_collection_name(base_name, version)
+        client = get_chroma_client()
+        _, collection_name = _resolve_collection(client, version)
         
         client.delete_collection(name=collection_name)
+        invalidate_collection_count(collection_name)
         
         logger.info(f"Collection {collection_name} deleted successfully")
         return jsonify({
@@ -402,66 +820,74 @@ def delete_collection(version):
         return jsonify({"error": f"Failed to delete collection: {str(e)}"}), 500
 
 
+def _iter_document_pages(collection, limit: int, offset: int):
+    """
+    Read a collection's document listing from Chroma one page at a time.
+    
+    Only metadatas are fetched; document text is not needed for listings.
+    
+    Args:
+        collection: Chroma collection
+        limit: Maximum number of documents (0 for all)
+        offset: Number of documents to skip
+    
+    Yields:
+        list: Up to DOCUMENTS_PAGE_SIZE document entries
+    """
+    remaining = limit if limit > 0 else None
+    while remaining is None or remaining > 0:
+        page_size = DOCUMENTS_PAGE_SIZE if remaining is None else min(remaining, DOCUMENTS_PAGE_SIZE)
+        results = collection.get(limit=page_size, offset=offset, include=['metadatas'])
+        ids = results['ids']
+        if not ids:
+            break
+        # Use 'or' to handle both missing key and None value cases
+        metadatas = results.get('metadatas') or [None] * len(ids)
+        yield [
+            {
+                'id': doc_id,
+                'metadata': metadata,
+                'source': metadata.get('source_file', metadata.get('source', 'Unknown')),
+                'page': metadata.get('page', ''),
+                'chunk_index': metadata.get('chunk_index', '')
+            }
+            for doc_id, metadata in zip(ids, (m or {} for m in metadatas))
+        ]
+        offset += len(ids)
+        if remaining is not None:
+            remaining -= len(ids)
+        if len(ids) < page_size:
+            break
+
+
 @app.route('/collections/<version>/documents', methods=['GET'])
 @requires_auth
 def list_collection_documents(version):
-    """List all documents in a specific collection."""
+    """List documents in a specific collection, optionally paginated with ?limit and ?offset."""
+    limit, offset, output_format = parse_query_args(DocumentsArgs)
+    if output_format not in ('json', 'ndjson'):
+        return jsonify({"error": f"Unsupported format: {output_format}"}), 400
     try:
-        import chromadb
-        from .utils import generate_collection_name
-        
-        client = chromadb.PersistentClient(path=os.getenv('CHROMA_PATH', 'chroma'))
-        base_name = os.getenv('COLLECTION_NAME', 'common-model-docs')
-        
-        # Try to determine if version is actually a version number or a full collection name
-        # First, try the version as-is (in case it's a full collection name)
-        # Then try with version suffix (in case it's a version number)
-        collection_name = None
-        collection = None
-        
-        # Check if version looks like a version number (contains digits)
-        import re
-        if re.match(r'^[\d.]+$', version):
-            # It's a version number, use versioned collection name
-            collection_name = generate_collection_name(base_name, version)
-        else:
-            # It might be a full collection name, try as-is first
-            try:
-                collection = client.get_collection(name=version)
-                collection_name = version
-            except Exception:
-                # If that fails, try with version suffix
-                collection_name = generate_collection_name(base_name, version)
+        collection, collection_name = _resolve_collection(get_chroma_client(), version)
         
-        if not collection:
-            collection = client.get_collection(name=collection_name)
+        if output_format == 'ndjson':
+            # One document per line, streamed page by page so the full listing is never built
+            def generate():
+                for page in _iter_document_pages(collection, limit, offset):
+                    yield b''.join(orjson.dumps(document, option=ORJSONProvider.options) + b"\n" for document in page)
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
         
-        # Get all documents from the collection
-        # Using limit=None to get all documents, but we'll use a reasonable limit
-        # ChromaDB's get() method can retrieve all documents
-        results = collection.get(limit=None)
+        documents = [document for page in _iter_document_pages(collection, limit, offset) for document in page]
         
-        documents = []
-        if results and results.get('ids'):
-            # Use 'or []' to handle both missing key and None value cases
-            metadatas = results.get('metadatas') or []
-            for i, doc_id in enumerate(results['ids']):
-                # Safely get metadata with bounds checking
-                metadata = metadatas[i] if i < len(metadatas) else {}
-                documents.append({
-                    'id': doc_id,
-                    'metadata': metadata,
-                    'source': metadata.get('source_file', metadata.get('source', 'Unknown')),
-                    'page': metadata.get('page', ''),
-                    'chunk_index': metadata.get('chunk_index', '')
-                })
-        
-        return jsonify({
+        # Large listings: serialize straight to bytes without going through the JSON provider
+        body = orjson.dumps({
             "version": version,
             "collection_name": collection_name,
             "documents": documents,
-            "total": len(documents)
-        }), 200
+            "total": get_collection_count(collection) if limit > 0 else len(documents)
+        }, option=ORJSONProvider.options)
+        return Response(body, status=200, mimetype='application/json')
     except Exception as e:
         logger.error(f"Error listing collection documents: {e}")
         return jsonify({"error": f"Failed to list documents: {str(e)}"}), 500
@@ -472,35 +898,11 @@ def list_collection_documents(version):
 def delete_collection_document(version, doc_id):
     """Delete a specific document from a collection."""
     try:
-        import chromadb
-        from .utils import generate_collection_name
-        import re
-        
-        client = chromadb.PersistentClient(path=os.getenv('CHROMA_PATH', 'chroma'))
-        base_name = os.getenv('COLLECTION_NAME', 'common-model-docs')
-        
-        # Try to determine if version is actually a version number or a full collection name
-        collection_name = None
-        collection = None
-        
-        # Check if version looks like a version number (contains digits)
-        if re.match(r'^[\d.]+$', version):
-            # It's a version number, use versioned collection name
-            collection_name = generate_collection_name(base_name, version)
-        else:
-            # It might be a full collection name, try as-is first
-            try:
-                collection = client.get_collection(name=version)
-                collection_name = version
-            except Exception:
-                # If that fails, try with version suffix
-                collection_name = generate_collection_name(base_name, version)
-        
-        if not collection:
-            collection = client.get_collection(name=collection_name)
+        collection, collection_name = _resolve_collection(get_chroma_client(), version)
         
         # Delete the document by ID
         collection.delete(ids=[doc_id])
+        invalidate_collection_count(collection_name)
         
         logger.info(f"Document {doc_id} deleted from collection {collection_name}")
         return jsonify({
@@ -514,23 +916,21 @@ def delete_collection_document(version, doc_id):
 
 
 @app.route('/stats', methods=['GET'])
+@conditional_get
 def get_stats():
     """Get system statistics including query and embedding metrics."""
+    days = parse_query_args(StatsArgs).days
     try:
-        from .monitoring import get_query_monitor, get_embedding_monitor
-        from .cache import get_cache
-        
-        days = int(request.args.get('days', 7))
-        
-        query_monitor = get_query_monitor()
-        embedding_monitor = get_embedding_monitor()
-        cache = get_cache()
-        
-        stats = {
-            'query_stats': query_monitor.get_query_stats(days),
-            'embedding_stats': embedding_monitor.get_embedding_stats(days),
-            'cache_stats': cache.stats()
+        sections = {
+            'query_stats': partial(get_query_monitor().get_query_stats, days),
+            'embedding_stats': partial(get_embedding_monitor().get_embedding_stats, days),
+            'cache_stats': get_cache().stats,
+            'semantic_cache_stats': get_semantic_cache().stats,
+            'response_cache_stats': get_response_cache().stats,
+            'embedding_cache_stats': get_embedding_cache_stats
         }
+        futures = {name: _stats_executor.submit(fn) for name, fn in sections.items()}
+        stats = {name: future.result() for name, future in futures.items()}
         
         return jsonify(stats), 200
     except Exception as e:
@@ -543,9 +943,10 @@ def get_stats():
 def clear_cache():
     """Clear the query cache."""
     try:
-        from .cache import get_cache
         cache = get_cache()
         cache.clear()
+        get_response_cache().clear()
+        get_semantic_cache().clear()
         return jsonify({"message": "Cache cleared successfully"}), 200
     except Exception as e:
         logger.error(f"Error clearing cache: {e}")
@@ -555,12 +956,9 @@ def clear_cache():
 @app.route('/query/multi-version', methods=['POST'])
 def query_multi_version():
     """Query documentation across multiple versions."""
-    if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
-    
-    data = request.json
-    if data is None:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
     
     question = data.get('query')
     versions = data.get('versions', [])
@@ -586,12 +984,9 @@ def query_multi_version():
 @app.route('/query/compare', methods=['POST'])
 def query_compare():
     """Compare answers across different versions."""
-    if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
-    
-    data = request.json
-    if data is None:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
     
     question = data.get('query')
     versions = data.get('versions', [])
@@ -615,17 +1010,17 @@ def query_compare():
 
 
 @app.route('/history', methods=['GET'])
+@conditional_get
 def get_history():
     """Get query history."""
+    limit, offset = parse_query_args(HistoryArgs)
     try:
         history = get_query_history()
-        limit = int(request.args.get('limit', 50))
-        offset = int(request.args.get('offset', 0))
         
         entries = history.get_history(limit=limit, offset=offset)
         return jsonify({
             "history": entries,
-            "total": len(history._load_history()),
+            "total": history.count(),
             "limit": limit,
             "offset": offset
         }), 200
@@ -637,10 +1032,9 @@ def get_history():
 @app.route('/history/search', methods=['GET'])
 def search_history():
     """Search query history."""
+    search_term, limit = parse_query_args(HistorySearchArgs)
     try:
         history = get_query_history()
-        search_term = request.args.get('q', '')
-        limit = int(request.args.get('limit', 20))
         
         if not search_term:
             return jsonify({"error": "Missing 'q' parameter"}), 400
@@ -662,13 +1056,12 @@ def export_history():
         history = get_query_history()
         format = request.args.get('format', 'json')
         
-        exported = history.export_history(format=format)
+        # Stream the export so large histories are never built up as one string
+        exported = stream_with_context(history.iter_export(format=format))
         
         if format == 'json':
-            import json as json_module
-            return jsonify(json_module.loads(exported)), 200
+            return Response(exported, mimetype='application/json')
         else:
-            from flask import Response
             return Response(
                 exported,
                 mimetype='text/csv',
@@ -690,10 +1083,10 @@ def manage_favorites():
             favorites = history.get_favorites()
             return jsonify({"favorites": favorites}), 200
         
-        if not request.is_json:
-            return jsonify({"error": "Content-Type must be application/json"}), 400
+        data = request.get_json(silent=True, cache=False)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
         
-        data = request.json
         query = data.get('query')
         
         if not query:
@@ -718,15 +1111,13 @@ def extract_code():
     if extract_code_from_document is None:
         return jsonify({"error": "Code extraction module not available"}), 501
     
-    if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
-    
-    data = request.json
-    if data is None:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
     
     text = data.get('text')
     language = data.get('language')  # Optional: filter by language
+    highlight = data.get('highlight', True) is not False  # Optional: skip highlighted renderings
     
     if not text:
         return jsonify({"error": "Missing 'text' field in request body"}), 400
@@ -736,7 +1127,7 @@ def extract_code():
         
         # Format code blocks for response
         formatted_blocks = [
-            format_code_for_response(block)
+            format_code_for_response(block, highlight=highlight)
             for block in result['blocks']
         ]
         
@@ -753,10 +1144,14 @@ def extract_code():
 @app.route('/auth/login', methods=['POST'])
 def login():
     """Login endpoint for username/password authentication."""
+    if verify_credentials is None:
+        return jsonify({"error": "Authentication module not available"}), 501
+    
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
+    
     try:
-        from .auth import verify_credentials, VALID_USERNAME
-        
-        data = request.get_json()
         username = data.get('username', '').strip()
         password = data.get('password', '').strip()
         
@@ -803,10 +1198,11 @@ def logout():
 
 
 @app.route('/auth/status', methods=['GET'])
+@conditional_get
 def auth_status():
     """Get authentication configuration status."""
     try:
-        if 'get_auth_status' in globals() and get_auth_status:
+        if get_auth_status is not None:
             status = get_auth_status()
             return jsonify(status), 200
         else:
@@ -841,12 +1237,9 @@ def get_confluence_settings_endpoint():
 @requires_write_auth
 def save_confluence_settings_endpoint():
     """Save Confluence settings."""
-    if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
-    
-    data = request.json
-    if data is None:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
     
     try:
         # Validate required fields
@@ -894,12 +1287,9 @@ def get_system_settings_endpoint():
 @requires_write_auth
 def save_system_settings_endpoint():
     """Save system settings."""
-    if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
-    
-    data = request.json
-    if data is None:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
     
     try:
         # Validate required fields
@@ -933,12 +1323,9 @@ def get_llm_providers_endpoint():
 @requires_write_auth
 def save_llm_providers_endpoint():
     """Save LLM provider configurations."""
-    if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
-    
-    data = request.json
-    if data is None:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
     
     try:
         # Validate structure
@@ -978,12 +1365,9 @@ def get_active_llm_providers_endpoint():
 @requires_write_auth
 def test_llm_provider_endpoint():
     """Test LLM or embedding provider connection with provided configuration."""
-    if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
-    
-    data = request.json
-    if data is None:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
     
     try:
         provider_type = data.get('type')
@@ -1037,12 +1421,9 @@ def test_llm_provider_endpoint():
 @requires_write_auth
 def test_confluence_connection():
     """Test Confluence connection with provided credentials."""
-    if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
-    
-    data = request.json
-    if data is None:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
     
     try:
         # Validate required fields
@@ -1075,13 +1456,11 @@ def test_confluence_connection():
 @app.route('/confluence/fetch', methods=['POST'])
 @requires_write_auth
 def fetch_confluence_pages():
-    """Fetch and embed Confluence pages."""
-    if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
-    
-    data = request.json
-    if data is None:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
+    """Fetch and embed Confluence pages; pass ?verbose=1 for untruncated error messages."""
+    verbose = parse_query_args(ConfluenceFetchArgs).verbose
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
     
     try:
         # Get page IDs from request or from saved settings
@@ -1122,6 +1501,12 @@ def fetch_confluence_pages():
             version=version,
             overwrite=overwrite
         )
+        if not verbose:
+            # Failed fetches can carry whole Confluence error pages; keep the summary small
+            results['errors'] = [
+                {'page_id': error['page_id'], 'error': _snippet(error['error'], ERROR_SNIPPET_CHARS)}
+                for error in results['errors']
+            ]
         
         return jsonify({
             "message": f"Processed {len(page_ids)} pages",
@@ -1136,12 +1521,9 @@ def fetch_confluence_pages():
 @requires_write_auth
 def import_confluence_page():
     """Import a single Confluence page to vector database using confluence-markdown-exporter."""
-    if not request.is_json:
-        return jsonify({"error": "Content-Type must be application/json"}), 400
-    
-    data = request.json
-    if data is None:
-        return jsonify({"error": "Invalid or missing JSON body"}), 400
+    data = request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object body with Content-Type: application/json"}), 400
     
     try:
         page_id = data.get('page_id')
@@ -1173,11 +1555,81 @@ def import_confluence_page():
         return jsonify({"error": f"Failed to import page: {str(e)}"}), 500
 
 
+def run_production_server(host: str, port: int):
+    """
+    Serve the app with gunicorn using worker/thread counts from the environment.
+    
+    Ollama and ChromaDB calls are I/O-bound, so several workers with a few
+    threads each let concurrent /query and /embed requests overlap.
+    
+    Args:
+        host: Interface to bind to
+        port: Port to listen on
+    """
+    from gunicorn.app.base import BaseApplication
+    
+    class _GunicornApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+        
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            return self.application
+    
+    options = {
+        'bind': f"{host}:{port}",
+        'workers': CONFIG.workers,
+        'worker_class': 'gthread',
+        'threads': CONFIG.threads,
+        'keepalive': CONFIG.keep_alive,
+        'timeout': CONFIG.timeout,
+        # Import the app (LangChain, ChromaDB bindings) once in the master and
+        # fork workers from it; the Chroma client itself is opened lazily in
+        # each worker since SQLite handles must not cross a fork
+        'preload_app': CONFIG.preload,
+    }
+    logger.info(f"Starting gunicorn with {options['workers']} workers x {options['threads']} threads")
+    _GunicornApplication(app, options).run()
+
+
+def run_waitress_server(host: str, port: int):
+    """
+    Serve the app with waitress, for platforms gunicorn does not run on (Windows).
+    
+    Waitress is a single process, so it gets the thread count gunicorn would
+    spread across its workers.
+    
+    Args:
+        host: Interface to bind to
+        port: Port to listen on
+    """
+    from waitress import serve
+    
+    threads = CONFIG.workers * CONFIG.threads
+    logger.info(f"Starting waitress with {threads} threads")
+    serve(app, host=host, port=port, threads=threads, channel_timeout=CONFIG.timeout)
+
+
 if __name__ == '__main__':
-    port = int(os.getenv('API_PORT', 8080))
-    host = os.getenv('API_HOST', 'localhost')
-    debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
+    port = CONFIG.port
+    host = CONFIG.host
+    debug = CONFIG.debug
     
     logger.info(f"Starting RAG API server on {host}:{port}")
-    app.run(host=host, port=port, debug=debug)
+    if debug:
+        app.run(host=host, port=port, debug=debug)
+    else:
+        try:
+            run_production_server(host, port)
+        except ImportError:
+            try:
+                run_waitress_server(host, port)
+            except ImportError:
+                logger.warning("Neither gunicorn nor waitress is available; falling back to the Flask development server")
+                app.run(host=host, port=port, debug=debug)
 
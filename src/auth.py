@@ -19,6 +19,15 @@ logger = setup_logging()
 AUTH_ENABLED = os.getenv('AUTH_ENABLED', 'true').lower() == 'true'
 AUTH_REQUIRED_FOR = os.getenv('AUTH_REQUIRED_FOR', 'write').lower()  # 'all', 'write', 'none'
 
+# HTTP methods treated as write operations by requires_write_auth
+_WRITE_METHODS = frozenset(('POST', 'PUT', 'PATCH', 'DELETE'))
+
+# Request-independent part of the auth status
+AUTH_CONFIG_STATUS = {
+    "enabled": AUTH_ENABLED,
+    "required_for": AUTH_REQUIRED_FOR
+}
+
 # Credentials from environment variables
 VALID_USERNAME = os.getenv('AUTH_USERNAME', 'admin')
 VALID_PASSWORD = os.getenv('AUTH_PASSWORD', '123QWEasd')
@@ -27,6 +36,10 @@ VALID_PASSWORD = os.getenv('AUTH_PASSWORD', '123QWEasd')
 if VALID_USERNAME == 'admin' and VALID_PASSWORD == '123QWEasd':
     logger.warning("Using default credentials. Set AUTH_USERNAME and AUTH_PASSWORD environment variables for production use.")
 
+# Fixed-length digests of the credentials, compared against digests of the submitted values
+_USERNAME_DIGEST = hashlib.sha256(VALID_USERNAME.encode()).digest()
+_PASSWORD_DIGEST = hashlib.sha256(VALID_PASSWORD.encode()).digest()
+
 
 def generate_api_key() -> str:
     """
@@ -50,9 +63,10 @@ def verify_credentials(username: str, password: str) -> bool:
     Returns:
         bool: True if credentials are valid
     """
-    # Use constant-time comparison to prevent timing attacks
-    username_valid = hmac.compare_digest(username, VALID_USERNAME)
-    password_valid = hmac.compare_digest(password, VALID_PASSWORD)
+    # Constant-time comparison of equal-length digests, so neither the content
+    # nor the length of the credentials leaks through timing
+    username_valid = hmac.compare_digest(hashlib.sha256(username.encode()).digest(), _USERNAME_DIGEST)
+    password_valid = hmac.compare_digest(hashlib.sha256(password.encode()).digest(), _PASSWORD_DIGEST)
     return username_valid and password_valid
 
 
@@ -70,17 +84,20 @@ def requires_auth(f):
     """
     Decorator to require authentication for an endpoint.
     
+    AUTH_ENABLED is fixed at import, so with authentication disabled the
+    endpoint is returned undecorated.
+    
     Usage:
         @app.route('/protected')
         @requires_auth
         def protected_endpoint():
             return jsonify({"message": "Protected"})
     """
+    if not AUTH_ENABLED:
+        return f
+    
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not AUTH_ENABLED:
-            return f(*args, **kwargs)
-        
         if not is_authenticated():
             return jsonify({
                 "error": "Authentication required",
@@ -97,6 +114,10 @@ def requires_write_auth(f):
     Decorator to require authentication only for write operations.
     Read operations are allowed without auth if AUTH_REQUIRED_FOR is 'write'.
     
+    The auth settings are fixed at import, so the check is chosen once here:
+    undecorated when no auth applies, requires_auth for 'all', and a
+    method check only for 'write'.
+    
     Usage:
         @app.route('/query', methods=['GET', 'POST'])
         @requires_write_auth
@@ -104,21 +125,18 @@ def requires_write_auth(f):
             # GET doesn't require auth, POST does
             return f(*args, **kwargs)
     """
+    if not AUTH_ENABLED or AUTH_REQUIRED_FOR not in ('all', 'write'):
+        return f
+    if AUTH_REQUIRED_FOR == 'all':
+        return requires_auth(f)
+    
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not AUTH_ENABLED:
-            return f(*args, **kwargs)
-        
-        # Check if this is a write operation
-        is_write = request.method in ['POST', 'PUT', 'PATCH', 'DELETE']
-        
-        # If auth is required for all, or this is a write operation
-        if AUTH_REQUIRED_FOR == 'all' or (AUTH_REQUIRED_FOR == 'write' and is_write):
-            if not is_authenticated():
-                return jsonify({
-                    "error": "Authentication required",
-                    "message": "Please log in to access this resource"
-                }), 401
+        if request.method in _WRITE_METHODS and not is_authenticated():
+            return jsonify({
+                "error": "Authentication required",
+                "message": "Please log in to access this resource"
+            }), 401
         
         return f(*args, **kwargs)
     
@@ -133,8 +151,7 @@ def get_auth_status() -> dict:
         dict: Authentication status information
     """
     return {
-        "enabled": AUTH_ENABLED,
-        "required_for": AUTH_REQUIRED_FOR,
+        **AUTH_CONFIG_STATUS,
         "authenticated": is_authenticated()
     }
 
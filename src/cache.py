@@ -3,45 +3,78 @@ Query Caching Module
 Caches frequently asked queries to improve performance.
 """
 import hashlib
-import json
+import orjson
 import os
+import sqlite3
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
-from .utils import setup_logging
+from .utils import ThreadLocalSQLite, setup_logging
 
 load_dotenv()
 
 CACHE_DIR = Path(os.getenv('CACHE_DIR', './.rag_cache'))
 CACHE_TTL = int(os.getenv('CACHE_TTL', 3600))  # Default: 1 hour
 CACHE_MAX_SIZE = int(os.getenv('CACHE_MAX_SIZE', 100))  # Maximum number of cached queries
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv('RESPONSE_CACHE_MAX_SIZE', 1024))  # In-memory /query responses (0 disables)
 
 logger = setup_logging()
 
 
+def _normalized_query_bytes(query: str) -> bytes:
+    """Strip and lowercase a query, encoded as UTF-8 for hashing."""
+    query = query.strip()
+    if query.isascii():
+        # Lowercase the encoded bytes rather than building another str
+        return query.encode().lower()
+    return query.lower().encode()
+
+
 class QueryCache:
-    """Simple file-based cache for query results."""
+    """SQLite-backed cache for query results."""
     
     def __init__(self, cache_dir: Path = None, ttl: int = None, max_size: int = None):
         self.cache_dir = Path(cache_dir or CACHE_DIR)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_file = self.cache_dir / 'cache.db'
         self.ttl = ttl or CACHE_TTL
         self.max_size = max_size or CACHE_MAX_SIZE
+        # Losing the last writes on power failure is fine for a cache
+        self._db = ThreadLocalSQLite(self.db_file,
+                                     on_connect=lambda conn: conn.execute('PRAGMA synchronous=NORMAL'))
+        self._init_db()
     
-    def _get_cache_key(self, query: str, version: str = None, k: int = 3) -> str:
-        """Generate cache key from query parameters."""
-        cache_data = {
-            'query': query.lower().strip(),
-            'version': version,
-            'k': k
-        }
-        cache_string = json.dumps(cache_data, sort_keys=True)
-        return hashlib.md5(cache_string.encode()).hexdigest()
+    def _init_db(self):
+        """Create the entries table and drop per-entry JSON files left by the old file cache."""
+        conn = self._db.connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        # created drives the TTL, used drives LRU eviction
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                created REAL NOT NULL,
+                used REAL NOT NULL,
+                blob BLOB NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS entries_used ON entries (used)')
+        
+        for cache_file in self.cache_dir.glob("*.json"):
+            cache_file.unlink(missing_ok=True)
     
-    def _get_cache_path(self, cache_key: str) -> Path:
-        """Get file path for cache entry."""
-        return self.cache_dir / f"{cache_key}.json"
+    def _get_cache_key(self, query: str, version: str = None, k: int = 3) -> str:
+        """Generate cache key from query parameters (fields are NUL-separated)."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(_normalized_query_bytes(query))
+        h.update(b'\x00')
+        h.update((version or '').encode())
+        h.update(b'\x00')
+        # k comes straight from the request body, so hash whatever value was sent
+        h.update(str(k).encode())
+        return h.hexdigest()
     
     def get(self, query: str, version: str = None, k: int = 3) -> Optional[Dict[str, Any]]:
         """
@@ -56,33 +89,32 @@ class QueryCache:
             Cached result dict or None if not found/expired
         """
         cache_key = self._get_cache_key(query, version, k)
-        cache_path = self._get_cache_path(cache_key)
-        
-        if not cache_path.exists():
-            return None
         
         try:
-            with open(cache_path, 'r') as f:
-                cache_entry = json.load(f)
-            
-            # Check if cache entry is expired
-            if time.time() - cache_entry['timestamp'] > self.ttl:
-                logger.debug(f"Cache entry expired for query: {query[:50]}...")
-                cache_path.unlink()
+            conn = self._db.connect()
+            now = time.time()
+            # Expired entries are filtered out before their blob is read; set() purges them
+            row = conn.execute('SELECT blob FROM entries WHERE key = ? AND created >= ?',
+                               (cache_key, now - self.ttl)).fetchone()
+            if row is None:
                 return None
             
+            result = orjson.loads(row[0])
+            conn.execute('UPDATE entries SET used = ? WHERE key = ?', (now, cache_key))
             logger.info(f"Cache hit for query: {query[:50]}...")
-            return cache_entry['result']
+            return result
         
-        except (json.JSONDecodeError, KeyError, IOError) as e:
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"Error reading cache entry: {e}")
+            self._db.connect().execute('DELETE FROM entries WHERE key = ?', (cache_key,))
+            return None
+        except sqlite3.Error as e:
             logger.warning(f"Error reading cache entry: {e}")
-            if cache_path.exists():
-                cache_path.unlink()
             return None
     
     def set(self, query: str, result: Dict[str, Any], version: str = None, k: int = 3):
         """
-        Cache a query result.
+        Cache a query result, evicting the least recently used entries when full.
         
         Args:
             query: The query string
@@ -91,64 +123,46 @@ class QueryCache:
             k: Number of documents retrieved
         """
         cache_key = self._get_cache_key(query, version, k)
-        cache_path = self._get_cache_path(cache_key)
-        
-        # Enforce max cache size
-        self._enforce_max_size()
+        blob = orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS)
+        now = time.time()
         
         try:
-            cache_entry = {
-                'timestamp': time.time(),
-                'query': query,
-                'version': version,
-                'k': k,
-                'result': result
-            }
-            
-            with open(cache_path, 'w') as f:
-                json.dump(cache_entry, f, indent=2)
+            conn = self._db.connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('INSERT OR REPLACE INTO entries (key, created, used, blob) VALUES (?, ?, ?, ?)',
+                             (cache_key, now, now, blob))
+                conn.execute('DELETE FROM entries WHERE created < ?', (now - self.ttl,))
+                # Enforce max cache size
+                conn.execute('''
+                    DELETE FROM entries WHERE key IN (
+                        SELECT key FROM entries ORDER BY used
+                        LIMIT max(0, (SELECT COUNT(*) FROM entries) - ?)
+                    )
+                ''', (self.max_size,))
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
             
             logger.info(f"Cached query result: {query[:50]}...")
         
-        except IOError as e:
+        except sqlite3.Error as e:
             logger.warning(f"Error writing cache entry: {e}")
     
-    def _enforce_max_size(self):
-        """Remove oldest cache entries if cache exceeds max size."""
-        cache_files = list(self.cache_dir.glob("*.json"))
-        
-        if len(cache_files) < self.max_size:
-            return
-        
-        # Sort by modification time (oldest first)
-        cache_files.sort(key=lambda p: p.stat().st_mtime)
-        
-        # Remove oldest entries
-        to_remove = len(cache_files) - self.max_size + 1
-        for cache_file in cache_files[:to_remove]:
-            try:
-                cache_file.unlink()
-                logger.debug(f"Removed old cache entry: {cache_file.name}")
-            except IOError as e:
-                logger.warning(f"Error removing cache entry: {e}")
-    
     def clear(self):
         """Clear all cache entries."""
-        cache_files = list(self.cache_dir.glob("*.json"))
-        for cache_file in cache_files:
-            try:
-                cache_file.unlink()
-            except IOError:
-                pass
-        logger.info(f"Cleared {len(cache_files)} cache entries")
+        cursor = self._db.connect().execute('DELETE FROM entries')
+        logger.info(f"Cleared {cursor.rowcount} cache entries")
     
     def stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
-        cache_files = list(self.cache_dir.glob("*.json"))
-        total_size = sum(f.stat().st_size for f in cache_files)
+        entries, total_size = self._db.connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(LENGTH(blob)), 0) FROM entries'
+        ).fetchone()
         
         return {
-            'entries': len(cache_files),
+            'entries': entries,
             'max_size': self.max_size,
             'total_size_bytes': total_size,
             'total_size_mb': round(total_size / (1024 * 1024), 2),
@@ -156,8 +170,95 @@ class QueryCache:
         }
 
 
+class ResponseCache:
+    """In-memory LRU cache with TTL for complete API responses."""
+    
+    def __init__(self, max_size: int = None, ttl: int = None):
+        self.max_size = RESPONSE_CACHE_MAX_SIZE if max_size is None else max_size
+        self.ttl = ttl or CACHE_TTL
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+    
+    @staticmethod
+    def make_key(query: str, *params) -> str:
+        """
+        Build a cache key from a query and the parameters that shape its answer.
+        
+        Args:
+            query: The query string (normalized to lowercase, stripped)
+            *params: Other request parameters, e.g. collection, version, k
+            
+        Returns:
+            str: 128-bit blake2b hex digest
+        """
+        h = hashlib.blake2b(_normalized_query_bytes(query), digest_size=16)
+        for param in params:
+            h.update(b'|')
+            h.update(str(param).encode())
+        return h.hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached response if present and not expired.
+        
+        Args:
+            key: Key from make_key()
+            
+        Returns:
+            Cached response dict or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key: str, value: Dict[str, Any]):
+        """
+        Cache a response, evicting the least recently used entry when full.
+        
+        Args:
+            key: Key from make_key()
+            value: Response to cache
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Clear all cache entries."""
+        with self._lock:
+            entries = len(self._entries)
+            self._entries.clear()
+        logger.info(f"Cleared {entries} response cache entries")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0
+        }
+
+
 # Global cache instance
 _cache_instance: Optional[QueryCache] = None
+_response_cache_instance: Optional[ResponseCache] = None
 
 
 def get_cache() -> QueryCache:
@@ -167,3 +268,10 @@ def get_cache() -> QueryCache:
         _cache_instance = QueryCache()
     return _cache_instance
 
+
+def get_response_cache() -> ResponseCache:
+    """Get global in-memory response cache instance."""
+    global _response_cache_instance
+    if _response_cache_instance is None:
+        _response_cache_instance = ResponseCache()
+    return _response_cache_instance
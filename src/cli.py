@@ -3,23 +3,40 @@
 Command-Line Interface for RAG System
 """
 import argparse
+import asyncio
 import sys
 import os
 from pathlib import Path
 
-# Add src to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+# Run as a script (python3 src/cli.py): import the modules as the src package
+# so their relative imports resolve
+if not __package__:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    import src  # noqa: F401
+    __package__ = 'src'
 
-from embed import embed_file, embed_directory
-from query import query_docs, query_simple
-from get_vector_db import get_vector_db
-from utils import get_maven_version, setup_logging, generate_collection_name
+# LangChain, Chroma and the providers are imported by the commands that use
+# them, so status and listing commands start quickly
+from .utils import get_maven_version, setup_logging, generate_collection_name
 
 logger = setup_logging()
 
+_chroma_client = None
+
+
+def get_chroma_client():
+    """Get the ChromaDB client for CHROMA_PATH, opened once per invocation."""
+    global _chroma_client
+    if _chroma_client is None:
+        import chromadb
+        _chroma_client = chromadb.PersistentClient(path=os.getenv('CHROMA_PATH', 'chroma'))
+    return _chroma_client
+
 
 def cmd_embed(args):
     """Embed a file or directory."""
+    from .embed import embed_file, aembed_directory
+    
     file_path = Path(args.file)
     
     if not file_path.exists():
@@ -35,11 +52,11 @@ def cmd_embed(args):
             )
             print(f"Successfully embedded: {file_path}")
         elif file_path.is_dir():
-            results = embed_directory(
+            results = asyncio.run(aembed_directory(
                 str(file_path),
                 version=args.version,
                 overwrite=args.overwrite
-            )
+            ))
             print(f"Embedding complete: {results['success']} succeeded, {results['failed']} failed")
             if results['errors']:
                 print("\nErrors:")
@@ -54,6 +71,8 @@ def cmd_embed(args):
 
 def cmd_query(args):
     """Query the documentation."""
+    from .query import query_docs, query_simple
+    
     try:
         if args.simple:
             result = query_simple(
@@ -106,8 +125,7 @@ def cmd_update_docs(args):
 def cmd_list_collections(args):
     """List all collections."""
     try:
-        import chromadb
-        client = chromadb.PersistentClient(path=os.getenv('CHROMA_PATH', 'chroma'))
+        client = get_chroma_client()
         collections = client.list_collections()
         
         if not collections:
@@ -139,8 +157,7 @@ def cmd_status(args):
     
     # Check ChromaDB
     try:
-        import chromadb
-        client = chromadb.PersistentClient(path=os.getenv('CHROMA_PATH', 'chroma'))
+        client = get_chroma_client()
         collections = client.list_collections()
         print(f"✓ ChromaDB: Available ({len(collections)} collections)")
         
@@ -161,7 +178,7 @@ def cmd_status(args):
     
     # Check cache
     try:
-        from cache import get_cache
+        from .cache import get_cache
         cache = get_cache()
         stats = cache.stats()
         print(f"\n✓ Cache: {stats['entries']} entries ({stats['total_size_mb']} MB)")
@@ -170,7 +187,7 @@ def cmd_status(args):
     
     # Check monitoring
     try:
-        from monitoring import get_query_monitor, get_embedding_monitor
+        from .monitoring import get_query_monitor
         query_monitor = get_query_monitor()
         query_stats = query_monitor.get_query_stats(days=7)
         print(f"\n✓ Monitoring: {query_stats.get('total_queries', 0)} queries tracked (7 days)")
@@ -183,10 +200,7 @@ def cmd_status(args):
 def cmd_delete_collection(args):
     """Delete a collection by version."""
     try:
-        import chromadb
-        from utils import generate_collection_name
-        
-        client = chromadb.PersistentClient(path=os.getenv('CHROMA_PATH', 'chroma'))
+        client = get_chroma_client()
         collection_name = generate_collection_name(
             os.getenv('COLLECTION_NAME', 'common-model-docs'),
             args.version
@@ -208,13 +222,15 @@ def main():
     embed_parser = subparsers.add_parser('embed', help='Embed a file or directory')
     embed_parser.add_argument('file', help='File or directory to embed')
     embed_parser.add_argument('--version', help='Version string for collection')
-    embed_parser.add_argument('--overwrite', action='store_true', help='Overwrite existing collection')
+    embed_parser.add_argument('--overwrite', action='store_true',
+                              help='Overwrite existing collection (files only; directories are added incrementally)')
     
     # Embed directory command (alias)
     embed_dir_parser = subparsers.add_parser('embed-dir', help='Embed all files in a directory')
     embed_dir_parser.add_argument('directory', help='Directory to embed')
     embed_dir_parser.add_argument('--version', help='Version string for collection')
-    embed_dir_parser.add_argument('--overwrite', action='store_true', help='Overwrite existing collection')
+    embed_dir_parser.add_argument('--overwrite', action='store_true',
+                                  help='Ignored for directories; files are always added incrementally')
     
     # Query command
     query_parser = subparsers.add_parser('query', help='Query the documentation')
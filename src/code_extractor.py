@@ -2,14 +2,121 @@
 Code Example Extraction Module
 Extracts and highlights code examples from documentation.
 """
+import html
 import re
-from typing import List, Dict, Any, Optional
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 from .utils import setup_logging
 
 logger = setup_logging()
 
+try:
+    from pygments import highlight as _pygments_highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+    _HTML_FORMATTER = HtmlFormatter(nowrap=True)
+except ImportError:
+    _pygments_highlight = None
 
-def extract_code_blocks(text: str) -> List[Dict[str, Any]]:
+MAX_SCAN_LEN = 2_000_000  # Larger documents are not scanned for code
+
+# Markdown fences, HTML <pre><code> and inline backticks, matched in a single scan
+_ALL_CODE_RE = re.compile(
+    r'(?P<md>```(?P<md_lang>\w+)?\n(?P<md_body>.*?)```)'
+    r'|(?P<html><pre><code(?:\s+class="language-(?P<html_lang>\w+)")?>(?P<html_body>.*?)</code></pre>)'
+    r'|(?P<inline>`(?P<inline_body>[^`]+)`)',
+    re.DOTALL | re.IGNORECASE
+)
+# Java blocks nest arbitrarily, which no regex can balance, and `.*?\{.*?\}` shapes backtrack
+# super-linearly on hostile pages (see Russ Cox, "Regular Expression Matching Can Be Simple And
+# Fast"). Regexes only find the headers; bodies come from one linear brace-matching pass.
+_JAVA_CLASS_START_RE = re.compile(r'\bpublic\s+(?:abstract\s+)?(?:class|interface|enum)\s+\w+')
+_JAVA_METHOD_START_RE = re.compile(r'\bpublic\s+(?:static\s+)?\w+\s+\w+\s*\([^(){};]*\)(?=\s*\{)')
+# Comments and string/char literals are skipped so braces inside them don't count; unterminated
+# comments and strings run to the end of the text/line rather than failing and rescanning
+_JAVA_TOKEN_RE = re.compile(
+    r'//[^\n]*|/\*.*?(?:\*/|\Z)|"(?:\\.|[^"\\\n])*"?|\'(?:\\.|[^\'\\\n]){1,6}\'|[{}]',
+    re.DOTALL
+)
+_MAX_HEADER_GAP = 1000  # Max chars between a block header and its opening brace
+_JAVA_LANG_ALIASES = frozenset({'java', 'javacode', 'java-code'})
+
+_JAVA_KEYWORDS = ['public', 'private', 'protected', 'class', 'interface',
+                  'extends', 'implements', 'return', 'if', 'else', 'for',
+                  'while', 'try', 'catch', 'finally', 'throw', 'throws',
+                  'import', 'package', 'static', 'final', 'abstract']
+_JAVA_KW_RE = re.compile(r'\b(' + '|'.join(map(re.escape, _JAVA_KEYWORDS)) + r')\b')
+
+
+@dataclass
+class CodeBlock:
+    """An extracted code block; supports block['field'] and block.get() like the dicts it replaced."""
+    __slots__ = ('code', 'language', 'type', 'start_pos', 'end_pos')
+    code: str
+    language: str
+    type: str
+    start_pos: int
+    end_pos: int
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'code': self.code,
+            'language': self.language,
+            'type': self.type,
+            'start_pos': self.start_pos,
+            'end_pos': self.end_pos
+        }
+
+
+def iter_code_blocks(text: str) -> Iterator[CodeBlock]:
+    """
+    Lazily yield code blocks from text (markdown, HTML, or plain text) in document order.
+    
+    Args:
+        text: Text content to extract code from
+        
+    Yields:
+        CodeBlock for each code block found
+    """
+    if len(text) > MAX_SCAN_LEN:
+        logger.warning(f"Skipping code extraction: text length {len(text)} exceeds {MAX_SCAN_LEN}")
+        return
+    
+    for match in _ALL_CODE_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == 'md':
+            language = match.group('md_lang') or 'text'
+            code = match.group('md_body').strip()
+            block_type = 'markdown'
+        elif kind == 'html':
+            language = match.group('html_lang') or 'text'
+            code = match.group('html_body').strip()
+            # Decode HTML entities; every entity starts with '&'
+            if '&' in code:
+                code = html.unescape(code)
+            block_type = 'html'
+        else:
+            code = match.group('inline_body')
+            if len(code) <= 10:  # Only include substantial inline code
+                continue
+            language = 'text'
+            block_type = 'inline'
+        yield CodeBlock(code, language, block_type, match.start(), match.end())
+
+
+def extract_code_blocks(text: str) -> List[CodeBlock]:
     """
     Extract code blocks from text (markdown, HTML, or plain text).
     
@@ -17,56 +124,46 @@ def extract_code_blocks(text: str) -> List[Dict[str, Any]]:
         text: Text content to extract code from
         
     Returns:
-        List of code blocks with metadata
+        List of CodeBlock objects
     """
-    code_blocks = []
-    
-    # Extract markdown code blocks
-    markdown_pattern = r'```(\w+)?\n(.*?)```'
-    for match in re.finditer(markdown_pattern, text, re.DOTALL):
-        language = match.group(1) or 'text'
-        code = match.group(2).strip()
-        code_blocks.append({
-            'code': code,
-            'language': language,
-            'type': 'markdown',
-            'start_pos': match.start(),
-            'end_pos': match.end()
-        })
-    
-    # Extract HTML <pre><code> blocks
-    html_pattern = r'<pre><code(?:\s+class="language-(\w+)")?>(.*?)</code></pre>'
-    for match in re.finditer(html_pattern, text, re.DOTALL | re.IGNORECASE):
-        language = match.group(1) or 'text'
-        code = match.group(2).strip()
-        # Decode HTML entities
-        import html
-        code = html.unescape(code)
-        code_blocks.append({
-            'code': code,
-            'language': language,
-            'type': 'html',
-            'start_pos': match.start(),
-            'end_pos': match.end()
-        })
-    
-    # Extract inline code (for short examples)
-    inline_pattern = r'`([^`]+)`'
-    for match in re.finditer(inline_pattern, text):
-        code = match.group(1)
-        if len(code) > 10:  # Only include substantial inline code
-            code_blocks.append({
-                'code': code,
-                'language': 'text',
-                'type': 'inline',
-                'start_pos': match.start(),
-                'end_pos': match.end()
-            })
-    
-    return code_blocks
-
-
-def extract_java_examples(text: str) -> List[Dict[str, Any]]:
+    return list(iter_code_blocks(text))
+
+
+def _match_braces(text: str) -> Tuple[List[int], Dict[int, int]]:
+    """Return the positions of all code braces '{' and a map from each to its matching '}'."""
+    opens = []
+    closes = {}
+    stack = []
+    for token in _JAVA_TOKEN_RE.finditer(text):
+        if token.group() == '{':
+            stack.append(token.start())
+            opens.append(token.start())
+        elif token.group() == '}' and stack:
+            closes[stack.pop()] = token.start()
+    return opens, closes
+
+
+def _scan_java_blocks(text: str, header_re: re.Pattern, braces: Tuple[List[int], Dict[int, int]]) -> Iterator[Tuple[int, int]]:
+    """Yield non-overlapping (start, end) spans of brace-balanced blocks introduced by header_re."""
+    opens, closes = braces
+    last_end = 0
+    for match in header_re.finditer(text):
+        if match.start() < last_end:
+            continue
+        i = bisect_left(opens, match.end())
+        if i == len(opens):
+            break
+        brace = opens[i]
+        if brace - match.end() > _MAX_HEADER_GAP or ';' in text[match.end():brace]:
+            continue
+        close = closes.get(brace)
+        if close is None:
+            continue
+        last_end = close + 1
+        yield match.start(), last_end
+
+
+def extract_java_examples(text: str) -> List[CodeBlock]:
     """
     Extract Java code examples specifically.
     
@@ -74,64 +171,65 @@ def extract_java_examples(text: str) -> List[Dict[str, Any]]:
         text: Text content to extract Java code from
         
     Returns:
-        List of Java code examples
+        List of Java CodeBlock objects
     """
+    if len(text) > MAX_SCAN_LEN:
+        logger.warning(f"Skipping Java extraction: text length {len(text)} exceeds {MAX_SCAN_LEN}")
+        return []
+    
     java_blocks = []
     
-    # Extract Java class definitions
-    java_class_pattern = r'(public\s+(?:abstract\s+)?(?:class|interface|enum)\s+\w+.*?\{.*?\})'
-    for match in re.finditer(java_class_pattern, text, re.DOTALL):
-        java_blocks.append({
-            'code': match.group(1),
-            'language': 'java',
-            'type': 'class',
-            'start_pos': match.start(),
-            'end_pos': match.end()
-        })
-    
-    # Extract method definitions
-    java_method_pattern = r'(public\s+(?:static\s+)?\w+\s+\w+\s*\([^)]*\)\s*\{[^}]*\})'
-    for match in re.finditer(java_method_pattern, text, re.DOTALL):
-        java_blocks.append({
-            'code': match.group(1),
-            'language': 'java',
-            'type': 'method',
-            'start_pos': match.start(),
-            'end_pos': match.end()
-        })
+    # Extract Java class and method definitions; braces are matched only if a header is present
+    braces = None
+    for block_type, header_re in (('class', _JAVA_CLASS_START_RE), ('method', _JAVA_METHOD_START_RE)):
+        if not header_re.search(text):
+            continue
+        if braces is None:
+            braces = _match_braces(text)
+        for start, end in _scan_java_blocks(text, header_re, braces):
+            java_blocks.append(CodeBlock(text[start:end], 'java', block_type, start, end))
     
     # Also get code blocks marked as Java
-    all_blocks = extract_code_blocks(text)
-    java_blocks.extend([
-        block for block in all_blocks
-        if block['language'].lower() in ['java', 'javacode', 'java-code']
-    ])
+    java_blocks.extend(
+        block for block in iter_code_blocks(text)
+        if block.language.lower() in _JAVA_LANG_ALIASES
+    )
     
     return java_blocks
 
 
+@lru_cache(maxsize=64)
+def _get_lexer(language: str):
+    """Pygments lexer for a language name, falling back to plain text for unknown names."""
+    try:
+        return get_lexer_by_name(language)
+    except ClassNotFound:
+        return get_lexer_by_name('text')
+
+
 def highlight_code(code: str, language: str = 'text') -> str:
     """
-    Simple code highlighting (basic syntax highlighting).
-    For production, consider using Pygments library.
+    Syntax-highlight code.
+    
+    With Pygments installed this returns HTML spans with Pygments CSS classes
+    (code is HTML-escaped, unknown languages are only escaped). Without it,
+    Java keywords are wrapped in ** and other languages are returned as-is.
     
     Args:
         code: Code to highlight
         language: Programming language
         
     Returns:
-        Highlighted code (currently returns as-is, can be enhanced)
+        Highlighted code
     """
+    if _pygments_highlight is not None:
+        highlighted = _pygments_highlight(code, _get_lexer(language.lower()), _HTML_FORMATTER)
+        # The formatter always terminates the last line; keep the input's own ending
+        return highlighted if code.endswith('\n') else highlighted.rstrip('\n')
+    
     # Basic keyword highlighting for Java
     if language.lower() == 'java':
-        keywords = ['public', 'private', 'protected', 'class', 'interface', 
-                   'extends', 'implements', 'return', 'if', 'else', 'for', 
-                   'while', 'try', 'catch', 'finally', 'throw', 'throws',
-                   'import', 'package', 'static', 'final', 'abstract']
-        
-        for keyword in keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            code = re.sub(pattern, f'**{keyword}**', code)
+        return _JAVA_KW_RE.sub(r'**\1**', code)
     
     return code
 
@@ -147,36 +245,46 @@ def extract_code_from_document(doc_content: str, language: str = None) -> Dict[s
     Returns:
         Dictionary with extracted code blocks
     """
-    if language and language.lower() == 'java':
-        code_blocks = extract_java_examples(doc_content)
+    wanted = language.lower() if language else None
+    if wanted == 'java':
+        candidates = extract_java_examples(doc_content)
     else:
-        code_blocks = extract_code_blocks(doc_content)
+        candidates = iter_code_blocks(doc_content)
     
-    if language:
-        code_blocks = [b for b in code_blocks if b['language'].lower() == language.lower()]
+    # Filter while extracting so non-matching blocks are never collected
+    code_blocks = []
+    languages = set()
+    for block in candidates:
+        if wanted and block.language.lower() != wanted:
+            continue
+        code_blocks.append(block)
+        languages.add(block.language)
     
     return {
         'total_blocks': len(code_blocks),
         'blocks': code_blocks,
-        'languages': list(set(b['language'] for b in code_blocks))
+        'languages': list(languages)
     }
 
 
-def format_code_for_response(code_block: Dict[str, Any]) -> Dict[str, Any]:
+def format_code_for_response(code_block: Union[CodeBlock, Dict[str, Any]], highlight: bool = True) -> Dict[str, Any]:
     """
     Format a code block for API response.
     
     Args:
-        code_block: Code block dictionary
+        code_block: CodeBlock or code block dictionary
+        highlight: Include a 'highlighted' rendering (the costly part of formatting)
         
     Returns:
         Formatted code block
     """
-    return {
+    formatted = {
         'code': code_block['code'],
         'language': code_block['language'],
         'type': code_block.get('type', 'unknown'),
-        'length': len(code_block['code']),
-        'highlighted': highlight_code(code_block['code'], code_block['language'])
+        'length': len(code_block['code'])
     }
+    if highlight:
+        formatted['highlighted'] = highlight_code(code_block['code'], code_block['language'])
+    return formatted
 
@@ -2,12 +2,88 @@
 Confluence Integration Module
 Provides functionality to fetch and process Confluence pages.
 """
+import html
+import os
 import re
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from dotenv import load_dotenv
 from .utils import setup_logging
 
+load_dotenv()
+
+CONFLUENCE_PAGE_CACHE_SIZE = int(os.getenv('CONFLUENCE_PAGE_CACHE_SIZE', 512))  # Fetched pages kept in memory
+CONFLUENCE_PAGE_CACHE_TTL = int(os.getenv('CONFLUENCE_PAGE_CACHE_TTL', 300))  # Seconds before a page is fetched again
+
 logger = setup_logging()
 
+_PAGEID_RE = re.compile(r'pageId=(\d+)')
+_PAGES_RE = re.compile(r'/pages/(\d+)/')
+# pageId= covers /pages/viewpage.action?pageId=123 and /display/SPACE/Title?pageId=123,
+# /pages/ covers /spaces/SPACE/pages/123/Title. Each is paired with a literal that must be present,
+# a plain substring scan that lets most non-matching URLs skip the regex entirely
+_ID_PATTERNS = (('pageId=', _PAGEID_RE), ('/pages/', _PAGES_RE))
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+_BODY_FORMATS = ('storage', 'view', 'editor')
+_CDATA_RE = re.compile(r'<!\[CDATA\[(.*?)\]\]>', re.DOTALL)
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _HTMLParser
+except ImportError:
+    _HTMLParser = None
+
+
+class PageCache:
+    """Thread-safe LRU of fetched pages keyed by (instance url, page id, expand), with a TTL."""
+
+    def __init__(self, max_size: int = None, ttl: int = None):
+        self.max_size = CONFLUENCE_PAGE_CACHE_SIZE if max_size is None else max_size
+        self.ttl = CONFLUENCE_PAGE_CACHE_TTL if ttl is None else ttl
+        self._entries: 'OrderedDict[Tuple[str, str, str], Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, page = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return page
+
+    def set(self, key: Tuple[str, str, str], page: Dict[str, Any]):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, page)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url: str, page_id: str = None):
+        """Drop cached pages of one instance, or only those of page_id."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == url and (page_id is None or k[1] == page_id)]:
+                del self._entries[key]
+
+
+# Shared by all integrations; instances are created per request
+_page_cache = PageCache()
+
+CQL_BATCH_SIZE = 50  # Confluence caps search results with expanded bodies at 50 per request
+
+CONNECTION_CHECK_TTL = 60  # Seconds a successful test_connection() result is reused
+
+# Instance url -> whether CQL batch fetching works there, learned on first use
+_cql_supported: Dict[str, bool] = {}
+
 
 class ConfluenceIntegration:
     """Integration with Confluence Cloud and Server instances."""
@@ -30,6 +106,7 @@ class ConfluenceIntegration:
         self.username = username
         self.password = password
         self._confluence = None
+        self._connection_ok_at: Optional[float] = None
         
         self._initialize_confluence()
     
@@ -89,39 +166,28 @@ class ConfluenceIntegration:
         Returns:
             dict: Connection test result with success status and message
         """
+        success = {
+            "success": True,
+            "message": "Connection successful",
+            "instance_type": self.instance_type,
+            "url": self.url
+        }
         try:
-            # Try to get current user or a simple API call
-            if self.instance_type == "cloud":
-                # For Cloud, try to get current user info
-                try:
-                    # Simple test: get all spaces (limited to 1)
-                    spaces = self._confluence.get_all_spaces(start=0, limit=1)
-                    return {
-                        "success": True,
-                        "message": "Connection successful",
-                        "instance_type": self.instance_type,
-                        "url": self.url
-                    }
-                except Exception as e:
-                    return {
-                        "success": False,
-                        "message": f"Connection failed: {str(e)}"
-                    }
-            else:
-                # For Server, try to get all spaces
-                try:
-                    spaces = self._confluence.get_all_spaces(start=0, limit=1)
-                    return {
-                        "success": True,
-                        "message": "Connection successful",
-                        "instance_type": self.instance_type,
-                        "url": self.url
-                    }
-                except Exception as e:
-                    return {
-                        "success": False,
-                        "message": f"Connection failed: {str(e)}"
-                    }
+            # Only successes are reused; a failing connection is probed again on every call
+            if self._connection_ok_at is not None and time.monotonic() - self._connection_ok_at < CONNECTION_CHECK_TTL:
+                return success
+            
+            # Simple test for Cloud and Server: get all spaces (limited to 1)
+            try:
+                self._confluence.get_all_spaces(start=0, limit=1)
+            except Exception as e:
+                self._connection_ok_at = None
+                return {
+                    "success": False,
+                    "message": f"Connection failed: {str(e)}"
+                }
+            self._connection_ok_at = time.monotonic()
+            return success
         except Exception as e:
             logger.error(f"Connection test failed: {e}")
             return {
@@ -144,20 +210,12 @@ class ConfluenceIntegration:
             return page_url_or_id
         
         # Try to extract from URL patterns
-        # Pattern 1: /pages/viewpage.action?pageId=123456
-        match = re.search(r'pageId=(\d+)', page_url_or_id)
-        if match:
-            return match.group(1)
-        
-        # Pattern 2: /spaces/SPACE/pages/123456/Title
-        match = re.search(r'/pages/(\d+)/', page_url_or_id)
-        if match:
-            return match.group(1)
-        
-        # Pattern 3: /display/SPACE/Page+Title?pageId=123456
-        match = re.search(r'pageId=(\d+)', page_url_or_id)
-        if match:
-            return match.group(1)
+        for marker, pattern in _ID_PATTERNS:
+            if marker not in page_url_or_id:
+                continue
+            match = pattern.search(page_url_or_id)
+            if match:
+                return match.group(1)
         
         logger.warning(f"Could not extract page ID from: {page_url_or_id}")
         return None
@@ -180,6 +238,11 @@ class ConfluenceIntegration:
                 logger.error(f"Invalid page ID or URL: {page_id}")
                 return None
             
+            cache_key = (self.url, actual_page_id, expand)
+            page = _page_cache.get(cache_key)
+            if page is not None:
+                return page
+            
             logger.info(f"Fetching Confluence page: {actual_page_id}")
             page = self._confluence.get_page_by_id(
                 page_id=actual_page_id,
@@ -190,24 +253,99 @@ class ConfluenceIntegration:
                 logger.warning(f"Page not found: {actual_page_id}")
                 return None
             
+            _page_cache.set(cache_key, page)
             return page
         except Exception as e:
             logger.error(f"Error fetching page {page_id}: {e}")
             return None
     
-    def fetch_pages(self, page_ids: List[str]) -> List[Dict[str, Any]]:
+    def invalidate_cache(self, page_id: str = None):
         """
-        Fetch multiple Confluence pages.
+        Forget cached pages of this instance so the next fetch hits Confluence.
+        
+        Args:
+            page_id: Page ID or URL to forget; all pages of this instance if omitted
+        """
+        actual_page_id = self.extract_page_id_from_url(page_id) if page_id else None
+        _page_cache.invalidate(self.url, actual_page_id)
+    
+    def _fetch_pages_cql(self, page_ids: List[str], expand: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch pages in batches with an `id in (...)` CQL search.
+        
+        Args:
+            page_ids: Numeric page IDs
+            expand: Comma-separated list of page properties to expand
+            
+        Returns:
+            dict: Page ID -> page data for every page the search returned
+        """
+        if _cql_supported.get(self.url) is False:
+            return {}
+        
+        # The search API wraps each page in a result object, so expansions apply to 'content'
+        search_expand = ','.join(f"content.{part}" for part in expand.split(','))
+        found = {}
+        try:
+            for i in range(0, len(page_ids), CQL_BATCH_SIZE):
+                batch = page_ids[i:i + CQL_BATCH_SIZE]
+                logger.info(f"Fetching {len(batch)} Confluence pages via CQL")
+                response = self._confluence.cql(f"id in ({','.join(batch)})", limit=len(batch), expand=search_expand)
+                for result in (response or {}).get('results', []):
+                    page = result.get('content', result)
+                    if page.get('id'):
+                        found[str(page['id'])] = page
+            _cql_supported[self.url] = True
+        except Exception as e:
+            logger.warning(f"CQL batch fetch failed, fetching pages one by one: {e}")
+            if not found:
+                _cql_supported[self.url] = False
+        return found
+    
+    def fetch_pages(self, page_ids: List[str], max_workers: int = 8,
+                    expand: str = "body.storage,space,version") -> List[Dict[str, Any]]:
+        """
+        Fetch multiple Confluence pages, batching them through CQL search where possible.
+        
+        Pages the search does not return are fetched individually and concurrently.
         
         Args:
             page_ids: List of page IDs or URLs
+            max_workers: Maximum number of concurrent single-page requests
+            expand: Comma-separated list of properties to expand
             
         Returns:
-            list: List of page data dictionaries
+            list: List of page data dictionaries, in page_ids order
         """
+        if not page_ids:
+            return []
+        
+        resolved = {page_id: self.extract_page_id_from_url(page_id) for page_id in page_ids}
+        fetched = {}
+        for actual_page_id in set(filter(None, resolved.values())):
+            page = _page_cache.get((self.url, actual_page_id, expand))
+            if page is not None:
+                fetched[actual_page_id] = page
+        
+        missing = sorted(set(filter(None, resolved.values())) - fetched.keys())
+        if len(missing) > 1:
+            for actual_page_id, page in self._fetch_pages_cql(missing, expand).items():
+                _page_cache.set((self.url, actual_page_id, expand), page)
+                fetched[actual_page_id] = page
+        
+        # Whatever the search missed (or unresolvable IDs, which fetch_page reports) goes one by one;
+        # network-bound, and the client's requests session is shared across threads
+        remaining = [page_id for page_id in page_ids if resolved[page_id] not in fetched]
+        if remaining:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(remaining)),
+                                    thread_name_prefix='confluence') as executor:
+                for page_id, page in zip(remaining, executor.map(lambda pid: self.fetch_page(pid, expand), remaining)):
+                    if page and resolved[page_id]:
+                        fetched[resolved[page_id]] = page
+        
         pages = []
         for page_id in page_ids:
-            page = self.fetch_page(page_id)
+            page = fetched.get(resolved[page_id])
             if page:
                 pages.append(page)
             else:
@@ -227,32 +365,34 @@ class ConfluenceIntegration:
         try:
             body = page.get('body', {})
             
-            # Try storage format first (most common)
-            if 'storage' in body:
-                content = body['storage'].get('value', '')
-            # Try view format
-            elif 'view' in body:
-                content = body['view'].get('value', '')
-            # Try editor format
-            elif 'editor' in body:
-                content = body['editor'].get('value', '')
+            # Storage format first (most common), then view, then editor
+            for body_format in _BODY_FORMATS:
+                if (section := body.get(body_format)) is not None:
+                    content = section.get('value', '')
+                    break
             else:
                 logger.warning("No body content found in page")
                 return ""
             
-            # Basic HTML/XML tag removal (simple approach)
-            # For production, consider using html2text or similar library
-            import html
-            from html.parser import HTMLParser
-            
-            # Decode HTML entities
-            content = html.unescape(content)
-            
-            # Remove HTML tags (simple regex - for production use proper HTML parser)
-            content = re.sub(r'<[^>]+>', '', content)
+            if _HTMLParser is not None:
+                # An HTML parser would drop CDATA as a comment, but storage format keeps code macro bodies there
+                if '<![CDATA[' in content:
+                    content = _CDATA_RE.sub(lambda m: html.escape(m.group(1), quote=False), content)
+                tree = _HTMLParser(content)
+                tree.strip_tags(['script', 'style'])
+                content = tree.text(separator=' ')
+                # The DOM is many times the size of the body; free it before the whitespace pass copies the text
+                del tree
+            else:
+                # Decode HTML entities; every entity starts with '&'
+                if '&' in content:
+                    content = html.unescape(content)
+                
+                # Remove HTML tags (simple regex fallback when selectolax is not installed)
+                content = _TAG_RE.sub('', content)
             
             # Clean up whitespace
-            content = re.sub(r'\s+', ' ', content)
+            content = _WS_RE.sub(' ', content)
             content = content.strip()
             
             return content
@@ -271,17 +411,20 @@ class ConfluenceIntegration:
             dict: Metadata dictionary
         """
         try:
-            space = page.get('space', {})
-            version = page.get('version', {})
+            space = page.get('space')
+            if not isinstance(space, dict):
+                space = {}
+            version = page.get('version')
+            page_id = str(page.get('id', ''))
             
             metadata = {
                 "source": "confluence",
-                "page_id": str(page.get('id', '')),
+                "page_id": page_id,
                 "page_title": page.get('title', ''),
-                "space_key": space.get('key', '') if isinstance(space, dict) else '',
-                "space_name": space.get('name', '') if isinstance(space, dict) else '',
+                "space_key": space.get('key', ''),
+                "space_name": space.get('name', ''),
                 "version": version.get('number', 1) if isinstance(version, dict) else 1,
-                "url": f"{self.url}/pages/viewpage.action?pageId={page.get('id', '')}"
+                "url": f"{self.url}/pages/viewpage.action?pageId={page_id}"
             }
             
             return metadata
@@ -2,32 +2,95 @@
 Document Embedding Module
 Processes and embeds documentation into vector database with incremental update support.
 """
+import asyncio
+import hashlib
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain_community.document_loaders import UnstructuredHTMLLoader
+from langchain_community.document_loaders.parsers import PyPDFParser
+from langchain_core.document_loaders import Blob
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from dotenv import load_dotenv
 import time
-from typing import Dict, Any, Optional
-from .get_vector_db import get_or_create_collection
+from typing import Dict, Any, Iterable, List, Optional, Iterator
+from .get_vector_db import get_chroma_client, get_or_create_collection, invalidate_collection_count
 from .utils import detect_document_format, extract_version_from_path, setup_logging
 from .monitoring import get_embedding_monitor
-from .confluence import ConfluenceIntegration
+from .confluence import CQL_BATCH_SIZE, ConfluenceIntegration
 from .llm_providers import EmbeddingProviderFactory
+from .embedding_cache import with_embedding_cache
 from .settings import get_active_embedding_provider, get_confluence_settings
 
+try:
+    from selectolax.lexbor import LexborHTMLParser as _HTMLParser
+except ImportError:
+    _HTMLParser = None
+
 load_dotenv()
 
 CHROMA_PATH = os.getenv('CHROMA_PATH', 'chroma')
 COLLECTION_NAME = os.getenv('COLLECTION_NAME', 'common-model-docs')
 TEXT_EMBEDDING_MODEL = os.getenv('TEXT_EMBEDDING_MODEL', 'nomic-embed-text')
 
+# Number of files embedded concurrently by embed_directory; keep at or below
+# OLLAMA_NUM_PARALLEL so requests do not just queue inside Ollama
+EMBED_CONCURRENCY = int(os.getenv('EMBED_CONCURRENCY', os.getenv('OLLAMA_NUM_PARALLEL', 4)))
+
+# Worker processes embed_directory uses to load and split files before embedding;
+# 0 loads and splits on the embedding threads instead
+EMBED_SPLIT_PROCESSES = int(os.getenv('EMBED_SPLIT_PROCESSES', 0))
+
+# Chunks sent to the embedding provider per request by aembed_directory
+EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', 1000))
+
+# HTML loader: 'selectolax' extracts body text directly (when installed), 'unstructured'
+# uses UnstructuredHTMLLoader's layout detection for complex documents
+HTML_LOADER = os.getenv('HTML_LOADER', 'selectolax').lower()
+
+# Chunks embed_confluence_pages buffers from fetched pages before writing them in one batch
+CONFLUENCE_FLUSH_CHUNKS = int(os.getenv('CONFLUENCE_FLUSH_CHUNKS', 512))
+
+# Formats embed_file can parse from a file-like object without a temporary file
+STREAMABLE_FORMATS = ('pdf', 'txt', 'md')
+
 logger = setup_logging()
 
 
+# Shared thread pool for batch embedding (created lazily)
+_embed_executor = None
+_embed_executor_lock = threading.Lock()
+
+
+def get_embed_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool used for batch embedding."""
+    global _embed_executor
+    if _embed_executor is None:
+        with _embed_executor_lock:
+            if _embed_executor is None:
+                _embed_executor = ThreadPoolExecutor(
+                    max_workers=EMBED_CONCURRENCY,
+                    thread_name_prefix='embed'
+                )
+    return _embed_executor
+
+
+def get_document_embedding() -> Embeddings:
+    """Create the active embedding provider's model, wrapped with the on-disk embedding cache."""
+    provider_config = get_active_embedding_provider()
+    return with_embedding_cache(
+        EmbeddingProviderFactory.get_embeddings(provider_config['type'], provider_config),
+        provider_config
+    )
+
+
 def get_or_create_collection_helper(collection_name, embedding_function, version=None):
     """
     Helper function to get or create collection.
@@ -36,23 +99,253 @@ def get_or_create_collection_helper(collection_name, embedding_function, version
     return get_or_create_collection(collection_name, embedding_function, version)
 
 
-def embed_file(file_path, collection_name=None, version=None, overwrite=False):
+@lru_cache(maxsize=8)
+def _get_splitter(chunk_size=1000, chunk_overlap=200) -> RecursiveCharacterTextSplitter:
+    """Get a shared text splitter; splitting keeps no state, so one instance serves all threads."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len
+    )
+
+
+def _delete_collection_if_exists(collection_name: str) -> bool:
+    """
+    Delete a collection for an overwrite, if it exists.
+    
+    Checking the collection list first avoids opening (and so creating) a
+    missing collection just to delete it again.
+    
+    Args:
+        collection_name: Name of the collection
+        
+    Returns:
+        bool: True if a collection was deleted
+    """
+    client = get_chroma_client()
+    try:
+        # list_collections() returns names on chromadb >= 0.6 and Collection objects before
+        existing_names = {getattr(c, 'name', c) for c in client.list_collections()}
+        if collection_name not in existing_names:
+            logger.debug(f"Collection {collection_name} does not exist; nothing to delete")
+            return False
+        client.delete_collection(collection_name)
+    except Exception as e:
+        logger.debug(f"Error deleting collection {collection_name}: {e}")
+        return False
+    logger.info(f"Deleted existing collection: {collection_name}")
+    return True
+
+
+def _chunk_id(chunk: Document) -> str:
+    """SHA-256 of a chunk's source (file path or Confluence page ID) and text."""
+    metadata = chunk.metadata or {}
+    source = str(metadata.get('source_file') or metadata.get('page_id') or metadata.get('source') or '')
+    return hashlib.sha256(f"{source}\0{chunk.page_content}".encode('utf-8')).hexdigest()
+
+
+def _unique_chunks(chunks: List[Document]) -> tuple:
+    """
+    Give chunks source- and content-derived ids, dropping repeats within a source.
+    
+    An unchanged chunk of the same file or page gets the same id on every run
+    and can be recognised as already embedded, while identical text in another
+    source (license headers, navigation) is kept with that source's metadata.
+    
+    Args:
+        chunks: Chunk Documents
+        
+    Returns:
+        tuple: (ids, chunks) with one entry per distinct (source, text) pair
+    """
+    unique = {}
+    for chunk in chunks:
+        unique.setdefault(_chunk_id(chunk), chunk)
+    return list(unique), list(unique.values())
+
+
+def _missing_chunks(collection, chunks: List[Document], max_batch: int) -> tuple:
+    """
+    Drop chunks whose content is already stored in collection.
+    
+    Args:
+        collection: Underlying chromadb collection
+        chunks: Chunk Documents
+        max_batch: Largest number of ids to look up per get()
+        
+    Returns:
+        tuple: (ids, chunks) for the chunks not yet in the collection
+    """
+    ids, chunks = _unique_chunks(chunks)
+    existing = set()
+    for i in range(0, len(ids), max_batch):
+        existing.update(collection.get(ids=ids[i:i + max_batch], include=[])['ids'])
+    if existing:
+        logger.info(f"Skipping {len(existing)} chunks already in the collection")
+        kept = [(chunk_id, chunk) for chunk_id, chunk in zip(ids, chunks) if chunk_id not in existing]
+        ids, chunks = [chunk_id for chunk_id, _ in kept], [chunk for _, chunk in kept]
+    return ids, chunks
+
+
+def _bulk_add(db: Chroma, chunks: List[Document]):
+    """
+    Embed chunks in one call and add them to an existing collection.
+    
+    Chunks of a source whose text is already in the collection are skipped
+    before embedding. Vectors for the rest are computed up front with a single
+    embed_documents() call, which providers batch natively, and written
+    straight to the underlying collection so Chroma does not interleave
+    embedding with its inserts. Writes are split into the largest batches
+    Chroma accepts (5461 by default).
+    
+    Args:
+        db: Open Chroma collection; its embedding function computes the vectors
+        chunks: Chunk Documents to add
+    """
+    max_batch = db._client.get_max_batch_size()
+    ids, chunks = _missing_chunks(db._collection, chunks, max_batch)
+    if not chunks:
+        return
+    texts = [chunk.page_content for chunk in chunks]
+    metadatas = [chunk.metadata for chunk in chunks]
+    vectors = db.embeddings.embed_documents(texts)
+    
+    for i in range(0, len(chunks), max_batch):
+        db._collection.add(
+            ids=ids[i:i + max_batch],
+            embeddings=vectors[i:i + max_batch],
+            documents=texts[i:i + max_batch],
+            metadatas=metadatas[i:i + max_batch]
+        )
+
+
+def _load_stream(stream, doc_format, filename):
+    """
+    Load documents from a file-like object without writing it to disk.
+    
+    Args:
+        stream: Readable binary or text file-like object
+        doc_format: One of STREAMABLE_FORMATS
+        filename: Original filename, recorded as the document source
+        
+    Returns:
+        Iterator[Document]: Loaded Document objects, one per PDF page
+    """
+    if doc_format == 'pdf':
+        return PyPDFParser().lazy_parse(Blob.from_data(stream.read(), path=filename))
+    content = stream.read()
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    return iter([Document(page_content=content, metadata={'source': filename})])
+
+
+def _load_html(file_path: Path) -> Iterator[Document]:
+    """Load an HTML file's body text with selectolax, without unstructured's detection pipeline."""
+    tree = _HTMLParser(file_path.read_text(encoding='utf-8', errors='replace'))
+    tree.strip_tags(['script', 'style', 'noscript'])
+    root = tree.body if tree.body is not None else tree.root
+    text = root.text(separator=' ', strip=True) if root is not None else ''
+    yield Document(page_content=text, metadata={'source': str(file_path)})
+
+
+def _load_file(file_path: Path, doc_format: str) -> Iterator[Document]:
+    """Lazily load a document from disk with the loader for its format, one page at a time for PDFs."""
+    if doc_format == 'pdf':
+        loader = PyPDFLoader(str(file_path))
+    elif doc_format == 'html':
+        if _HTMLParser is not None and HTML_LOADER != 'unstructured':
+            return _load_html(file_path)
+        loader = UnstructuredHTMLLoader(str(file_path))
+    else:
+        loader = TextLoader(str(file_path))
+    return loader.lazy_load()
+
+
+def _chunk_documents(documents: Iterable[Document], file_path: Path, doc_format: str, version=None) -> List[Document]:
+    """
+    Split loaded documents into chunks tagged with their source file, format and version.
+    
+    Documents are split one at a time as they are loaded, so only the current
+    PDF page is held in memory alongside the chunks.
+    
+    Args:
+        documents: Documents loaded from file_path, e.g. the iterator from _load_file
+        file_path: Path recorded as the chunks' source_file
+        doc_format: Detected document format
+        version: Version to record; extracted from the path if not given
+        
+    Returns:
+        list: Chunk Documents
+    """
+    text_splitter = _get_splitter()
+    chunks = []
+    document_count = 0
+    for document in documents:
+        chunks.extend(text_splitter.split_documents([document]))
+        document_count += 1
+    logger.info(f"Loaded {document_count} documents from {file_path}, split into {len(chunks)} chunks")
+    
+    # Add metadata to chunks; the values are the same for every chunk of the file
+    source_file = str(file_path)
+    base_metadata = {'source_file': source_file, 'file_format': doc_format}
+    # Try to extract version from path if not given
+    version = version or extract_version_from_path(source_file)
+    if version:
+        base_metadata['version'] = version
+    for chunk in chunks:
+        chunk.metadata = {**(chunk.metadata or {}), **base_metadata}
+    return chunks
+
+
+def _load_and_split(file_path, version=None) -> List[tuple]:
+    """
+    Load and split a file; run in a worker process by iter_embed_directory.
+    
+    Args:
+        file_path: Path to the file
+        version: Version to record; extracted from the path if not given
+        
+    Returns:
+        list: (page_content, metadata) tuples, which pickle more cheaply than Documents
+    """
+    file_path = Path(file_path)
+    doc_format = detect_document_format(str(file_path))
+    if doc_format not in ['pdf', 'html', 'txt', 'md']:
+        raise ValueError(f"Unsupported document format: {doc_format}")
+    chunks = _chunk_documents(_load_file(file_path, doc_format), file_path, doc_format, version)
+    return [(chunk.page_content, chunk.metadata) for chunk in chunks]
+
+
+def embed_file(file_path, collection_name=None, version=None, overwrite=False, filename=None,
+               embedding: Optional[Embeddings] = None, db: Optional[Chroma] = None,
+               chunks: Optional[List[Document]] = None):
     """
     Embed a file into ChromaDB with support for incremental updates.
     
     Args:
-        file_path: Path to the file to embed
+        file_path: Path to the file to embed, or a file-like object (e.g. an
+            uploaded file stream); PDF, TXT and MD are parsed in memory
         collection_name: Name of the collection (defaults to COLLECTION_NAME)
         version: Optional version string for version-specific collections
         overwrite: If True, delete existing collection before embedding
+        filename: Original filename, required when file_path is a file-like object
+        embedding: Embedding model to reuse (defaults to get_document_embedding())
+        db: Open collection to add to; when given, chunks are always added
+            incrementally and collection_name/overwrite are only used for logging
+        chunks: Chunks already split from file_path; loading and splitting are skipped
         
     Returns:
         Chroma: ChromaDB instance
     """
-    file_path = Path(file_path)
-    
-    if not file_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
+    is_stream = hasattr(file_path, 'read')
+    if is_stream:
+        if not filename:
+            raise ValueError("filename is required when embedding from a stream")
+        stream, file_path = file_path, Path(filename)
+    else:
+        file_path = Path(file_path)
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
     
     # Determine collection name
     if version:
@@ -63,67 +356,46 @@ def embed_file(file_path, collection_name=None, version=None, overwrite=False):
     logger.info(f"Embedding file: {file_path} into collection: {final_collection_name}")
     start_time = time.time()
     
-    # Detect document format and load
-    doc_format = detect_document_format(str(file_path))
-    
-    if doc_format == 'pdf':
-        loader = PyPDFLoader(str(file_path))
-    elif doc_format == 'html':
-        loader = UnstructuredHTMLLoader(str(file_path))
-    elif doc_format in ['txt', 'md']:
-        loader = TextLoader(str(file_path))
-    else:
-        raise ValueError(f"Unsupported document format: {doc_format}")
-    
-    documents = loader.load()
-    logger.info(f"Loaded {len(documents)} documents from {file_path}")
-    
-    # Split into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
-    )
-    chunks = text_splitter.split_documents(documents)
-    logger.info(f"Split into {len(chunks)} chunks")
-    
-    # Add metadata to chunks
-    for chunk in chunks:
-        chunk.metadata = chunk.metadata or {}
-        chunk.metadata['source_file'] = str(file_path)
-        chunk.metadata['file_format'] = doc_format
-        if version:
-            chunk.metadata['version'] = version
+    if chunks is None:
+        # Detect document format and load
+        doc_format = detect_document_format(str(file_path))
+        
+        if doc_format not in ['pdf', 'html', 'txt', 'md']:
+            raise ValueError(f"Unsupported document format: {doc_format}")
+        
+        if is_stream:
+            if doc_format not in STREAMABLE_FORMATS:
+                raise ValueError(f"Document format {doc_format} cannot be loaded from a stream")
+            documents = _load_stream(stream, doc_format, str(file_path))
         else:
-            # Try to extract version from path
-            extracted_version = extract_version_from_path(str(file_path))
-            if extracted_version:
-                chunk.metadata['version'] = extracted_version
+            documents = _load_file(file_path, doc_format)
+        
+        # Split into chunks as pages are loaded
+        chunks = _chunk_documents(documents, file_path, doc_format, version)
     
     # Create embeddings
-    provider_config = get_active_embedding_provider()
-    embedding = EmbeddingProviderFactory.get_embeddings(provider_config['type'], provider_config)
+    if embedding is None:
+        embedding = get_document_embedding()
+    
+    if db is not None:
+        # Shared collection handle from embed_directory; always incremental
+        logger.info(f"Incremental update: adding {len(chunks)} chunks to existing collection")
+        _bulk_add(db, chunks)
+        logger.info(f"Added {len(chunks)} chunks to collection: {final_collection_name}")
     
     # Handle collection creation or update
-    if overwrite:
+    elif overwrite:
         logger.info(f"Overwrite mode: deleting existing collection {final_collection_name}")
-        # Delete existing collection if it exists
-        try:
-            existing_db = Chroma(
-                collection_name=final_collection_name,
-                persist_directory=CHROMA_PATH,
-                embedding_function=embedding
-            )
-            existing_db.delete_collection()
-            logger.info(f"Deleted existing collection: {final_collection_name}")
-        except Exception as e:
-            logger.debug(f"Collection {final_collection_name} does not exist or error deleting: {e}")
+        _delete_collection_if_exists(final_collection_name)
         
         # After deletion, always create new collection
+        ids, unique_chunks = _unique_chunks(chunks)
         db = Chroma.from_documents(
-            chunks,
+            unique_chunks,
             embedding,
+            ids=ids,
             collection_name=final_collection_name,
-            persist_directory=CHROMA_PATH
+            client=get_chroma_client()
         )
         logger.info(f"Created new collection: {final_collection_name} with {len(chunks)} chunks")
     else:
@@ -138,18 +410,21 @@ def embed_file(file_path, collection_name=None, version=None, overwrite=False):
             # Incremental update: add documents to existing collection
             # This preserves all existing documents and appends new ones
             logger.info(f"Incremental update: adding {len(chunks)} chunks to existing collection")
-            db.add_documents(chunks)
+            _bulk_add(db, chunks)
             logger.info(f"Added {len(chunks)} chunks to collection: {final_collection_name}")
         else:
             # Create new collection with documents
             logger.info(f"Creating new collection: {final_collection_name}")
+            ids, unique_chunks = _unique_chunks(chunks)
             db = Chroma.from_documents(
-                chunks,
+                unique_chunks,
                 embedding,
+                ids=ids,
                 collection_name=final_collection_name,
-                persist_directory=CHROMA_PATH
+                client=get_chroma_client()
             )
             logger.info(f"Created new collection: {final_collection_name} with {len(chunks)} chunks")
+    invalidate_collection_count(final_collection_name)
     
     # Log to monitoring
     duration = time.time() - start_time
@@ -166,83 +441,262 @@ def embed_file(file_path, collection_name=None, version=None, overwrite=False):
     return db
 
 
-def embed_directory(directory_path, collection_name=None, version=None, overwrite=False, file_extensions=None):
+def _walk_files(directory_path) -> Iterator[Path]:
+    """Yield every regular file under directory_path in a single os.scandir walk."""
+    with os.scandir(directory_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_files(entry.path)
+            elif entry.is_file():
+                yield Path(entry.path)
+
+
+def _find_files(directory_path, file_extensions=None) -> List[Path]:
+    """List the files under directory_path with one of file_extensions."""
+    if file_extensions is None:
+        file_extensions = ['.pdf', '.html', '.htm', '.txt', '.md']
+    
+    directory_path = Path(directory_path)
+    if not directory_path.is_dir():
+        raise ValueError(f"Not a directory: {directory_path}")
+    
+    extensions = frozenset(ext.lower() for ext in file_extensions)
+    files = [path for path in _walk_files(directory_path) if path.suffix.lower() in extensions]
+    
+    logger.info(f"Found {len(files)} files to embed in {directory_path}")
+    return files
+
+
+def iter_embed_directory(directory_path, collection_name=None, version=None, file_extensions=None,
+                         executor: Optional[ThreadPoolExecutor] = None,
+                         split_processes: Optional[int] = None) -> Iterator[Dict[str, Any]]:
     """
-    Embed all supported files from a directory.
+    Embed all supported files from a directory concurrently.
+    
+    Files are always added incrementally. The embedding model and collection
+    handle are created once and shared by every file. Results are yielded in
+    completion order so callers can report progress while the batch is running.
+    
+    With split_processes, files are loaded and split on a process pool so the
+    CPU-bound splitting is not serialized by the GIL; only embedding and
+    inserting run on the thread pool.
     
     Args:
         directory_path: Path to the directory
         collection_name: Name of the collection
         version: Optional version string
-        overwrite: If True, delete existing collection before embedding
         file_extensions: List of file extensions to process (default: ['.pdf', '.html', '.txt', '.md'])
+        executor: Thread pool to run embed_file on (defaults to the shared pool)
+        split_processes: Worker processes for loading and splitting (defaults to
+            EMBED_SPLIT_PROCESSES; 0 splits on the embedding threads)
         
-    Returns:
-        dict: Summary of embedding operations
+    Yields:
+        dict: Per-file result with 'file', 'success' and, on failure, 'error'
     """
-    if file_extensions is None:
-        file_extensions = ['.pdf', '.html', '.htm', '.txt', '.md']
+    files = _find_files(directory_path, file_extensions)
+    if not files:
+        return
     
-    directory_path = Path(directory_path)
-    if not directory_path.is_dir():
-        raise ValueError(f"Not a directory: {directory_path}")
+    embedding = get_document_embedding()
+    db, _ = get_or_create_collection_helper(collection_name or COLLECTION_NAME, embedding, version)
     
-    files = []
-    for ext in file_extensions:
-        files.extend(directory_path.rglob(f'*{ext}'))
+    executor = executor or get_embed_executor()
+    if split_processes is None:
+        split_processes = EMBED_SPLIT_PROCESSES
     
-    logger.info(f"Found {len(files)} files to embed in {directory_path}")
+    futures = {}
+    if split_processes > 0:
+        # Spawn rather than fork: this runs on embed and task threads inside gunicorn workers,
+        # and forking a multi-threaded process can leave locks held in the child
+        with ProcessPoolExecutor(max_workers=split_processes,
+                                 mp_context=multiprocessing.get_context('spawn')) as split_pool:
+            splits = {
+                split_pool.submit(_load_and_split, str(file_path), version): file_path
+                for file_path in files
+            }
+            for split in as_completed(splits):
+                file_path = splits[split]
+                try:
+                    chunks = [Document(page_content=text, metadata=metadata) for text, metadata in split.result()]
+                except Exception as e:
+                    logger.error(f"Failed to embed {file_path}: {e}")
+                    yield {'file': str(file_path), 'success': False, 'error': str(e)}
+                    continue
+                future = executor.submit(embed_file, str(file_path), collection_name, version, overwrite=False,
+                                         embedding=embedding, db=db, chunks=chunks)
+                futures[future] = file_path
+    else:
+        for file_path in files:
+            future = executor.submit(embed_file, str(file_path), collection_name, version, overwrite=False,
+                                     embedding=embedding, db=db)
+            futures[future] = file_path
+    
+    for future in as_completed(futures):
+        file_path = futures[future]
+        try:
+            future.result()
+            yield {'file': str(file_path), 'success': True}
+        except Exception as e:
+            logger.error(f"Failed to embed {file_path}: {e}")
+            yield {'file': str(file_path), 'success': False, 'error': str(e)}
+
+
+def embed_directory(directory_path, collection_name=None, version=None, overwrite=False, file_extensions=None,
+                    executor: Optional[ThreadPoolExecutor] = None, split_processes: Optional[int] = None):
+    """
+    Embed all supported files from a directory.
     
+    Args:
+        directory_path: Path to the directory
+        collection_name: Name of the collection
+        version: Optional version string
+        overwrite: Ignored; files are always added incrementally
+        file_extensions: List of file extensions to process (default: ['.pdf', '.html', '.txt', '.md'])
+        executor: Thread pool to run embed_file on (defaults to the shared pool)
+        split_processes: Worker processes for loading and splitting (defaults to EMBED_SPLIT_PROCESSES)
+        
+    Returns:
+        dict: Summary of embedding operations
+    """
     results = {
         'success': 0,
         'failed': 0,
         'errors': []
     }
     
-    for file_path in files:
-        try:
-            embed_file(str(file_path), collection_name, version, overwrite=False)  # Always incremental for batch
+    for result in iter_embed_directory(directory_path, collection_name, version, file_extensions, executor,
+                                       split_processes):
+        if result['success']:
             results['success'] += 1
-        except Exception as e:
-            logger.error(f"Failed to embed {file_path}: {e}")
+        else:
             results['failed'] += 1
-            results['errors'].append({'file': str(file_path), 'error': str(e)})
+            results['errors'].append({'file': result['file'], 'error': result['error']})
     
     logger.info(f"Embedding complete: {results['success']} succeeded, {results['failed']} failed")
     return results
 
 
-def embed_confluence_page(page_id: str, confluence_config: Dict[str, Any], 
-                          collection_name=None, version=None, overwrite=False) -> Chroma:
+async def aembed_directory(directory_path, collection_name=None, version=None, overwrite=False,
+                           file_extensions=None, concurrency: int = None) -> Dict[str, Any]:
     """
-    Embed a Confluence page into ChromaDB.
+    Embed all supported files from a directory with asyncio.
+    
+    Files are loaded and split on worker threads, their chunks embedded with
+    concurrent aembed_documents() calls in batches of EMBED_BATCH_SIZE, and the
+    precomputed vectors added straight to the collection as each batch completes.
+    The embedding model and collection handle are created once for all files.
+    Like embed_directory, files are always added incrementally.
     
     Args:
-        page_id: Confluence page ID or URL
-        confluence_config: Dictionary with Confluence configuration:
-            - url: Confluence instance URL
-            - instance_type: "cloud" or "server"
-            - api_token: API token (optional)
-            - username: Username (optional, for server or cloud)
-            - password: Password or API token (optional)
-        collection_name: Name of the collection (defaults to COLLECTION_NAME)
-        version: Optional version string for version-specific collections
-        overwrite: If True, delete existing collection before embedding
+        directory_path: Path to the directory
+        collection_name: Name of the collection
+        version: Optional version string
+        overwrite: Ignored, as in embed_directory; the collection is never deleted
+        file_extensions: List of file extensions to process (default: ['.pdf', '.html', '.txt', '.md'])
+        concurrency: Files and embedding requests in flight (defaults to EMBED_CONCURRENCY)
         
     Returns:
-        Chroma: ChromaDB instance
+        dict: Summary of embedding operations, as returned by embed_directory
     """
-    # Initialize Confluence integration
-    confluence = ConfluenceIntegration(
+    files = _find_files(directory_path, file_extensions)
+    concurrency = concurrency or EMBED_CONCURRENCY
+    
+    if version:
+        final_collection_name = f"{collection_name or COLLECTION_NAME}-v{version}"
+    else:
+        final_collection_name = collection_name or COLLECTION_NAME
+    
+    embedding = get_document_embedding()
+    
+    db, _ = get_or_create_collection_helper(collection_name or COLLECTION_NAME, embedding, version)
+    if db is None:
+        raise RuntimeError(f"Could not open collection: {final_collection_name}")
+    
+    file_gate = asyncio.Semaphore(concurrency)
+    request_gate = asyncio.Semaphore(concurrency)
+    monitor = get_embedding_monitor()
+    
+    async def embed_batch(batch: List[Document]):
+        ids, batch = await asyncio.to_thread(_missing_chunks, db._collection, batch, EMBED_BATCH_SIZE)
+        if not batch:
+            return
+        texts = [chunk.page_content for chunk in batch]
+        async with request_gate:
+            vectors = await embedding.aembed_documents(texts)
+        await asyncio.to_thread(
+            db._collection.add,
+            ids=ids,
+            embeddings=vectors,
+            documents=texts,
+            metadatas=[chunk.metadata for chunk in batch]
+        )
+    
+    async def embed_one(file_path: Path):
+        async with file_gate:
+            start_time = time.time()
+            doc_format = detect_document_format(str(file_path))
+            if doc_format not in ['pdf', 'html', 'txt', 'md']:
+                raise ValueError(f"Unsupported document format: {doc_format}")
+            documents = _load_file(file_path, doc_format)
+            chunks = await asyncio.to_thread(_chunk_documents, documents, file_path, doc_format, version)
+            await asyncio.gather(*(
+                embed_batch(chunks[i:i + EMBED_BATCH_SIZE])
+                for i in range(0, len(chunks), EMBED_BATCH_SIZE)
+            ))
+            monitor.log_embedding(
+                str(file_path),
+                version=version,
+                collection_name=final_collection_name,
+                chunk_count=len(chunks),
+                duration=time.time() - start_time,
+                success=True
+            )
+    
+    outcomes = await asyncio.gather(*(embed_one(file_path) for file_path in files), return_exceptions=True)
+    invalidate_collection_count(final_collection_name)
+    
+    results = {
+        'success': 0,
+        'failed': 0,
+        'errors': []
+    }
+    for file_path, outcome in zip(files, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Failed to embed {file_path}: {outcome}")
+            results['failed'] += 1
+            results['errors'].append({'file': str(file_path), 'error': str(outcome)})
+        else:
+            results['success'] += 1
+    
+    logger.info(f"Embedding complete: {results['success']} succeeded, {results['failed']} failed")
+    return results
+
+
+def _confluence_from_config(confluence_config: Dict[str, Any]) -> ConfluenceIntegration:
+    """Create the Confluence integration described by a confluence_config dictionary."""
+    return ConfluenceIntegration(
         url=confluence_config['url'],
         instance_type=confluence_config.get('instance_type', 'cloud'),
         api_token=confluence_config.get('api_token'),
         username=confluence_config.get('username'),
         password=confluence_config.get('password')
     )
+
+
+def _chunk_confluence_page(confluence: ConfluenceIntegration, page: Optional[Dict[str, Any]],
+                           page_id: str, version=None) -> List[Document]:
+    """
+    Split a fetched Confluence page into chunks tagged with its metadata and version.
     
-    # Fetch the page with expanded content
-    page = confluence.fetch_page(page_id, expand="body.storage,space,version")
+    Args:
+        confluence: Integration the page was fetched with
+        page: Page data from fetch_page, or None if the fetch failed
+        page_id: Page ID or URL, for error messages
+        version: Optional version to record
+        
+    Returns:
+        list: Chunk Documents
+    """
     if not page:
         raise ValueError(f"Failed to fetch Confluence page: {page_id}")
     
@@ -253,59 +707,74 @@ def embed_confluence_page(page_id: str, confluence_config: Dict[str, Any],
     if not content:
         raise ValueError(f"No content found in Confluence page: {page_id}")
     
-    # Determine collection name
-    if version:
-        final_collection_name = f"{collection_name or COLLECTION_NAME}-v{version}"
-    else:
-        final_collection_name = collection_name or COLLECTION_NAME
-    
-    logger.info(f"Embedding Confluence page: {metadata.get('page_title', page_id)} into collection: {final_collection_name}")
-    start_time = time.time()
-    
-    # Create Document object from Confluence content
+    # Create Document object from Confluence content and split into chunks
     document = Document(
         page_content=content,
         metadata=metadata
     )
-    
-    # Split into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
-    )
-    chunks = text_splitter.split_documents([document])
-    logger.info(f"Split into {len(chunks)} chunks")
+    chunks = _get_splitter().split_documents([document])
+    logger.info(f"Split Confluence page {metadata.get('page_title') or page_id} into {len(chunks)} chunks")
     
     # Add version to metadata if provided
     if version:
         for chunk in chunks:
             chunk.metadata['version'] = version
+    return chunks
+
+
+def embed_confluence_page(page_id: str, confluence_config: Dict[str, Any], 
+                          collection_name=None, version=None, overwrite=False) -> Chroma:
+    """
+    Embed a Confluence page into ChromaDB.
+    
+    Args:
+        page_id: Confluence page ID or URL
+        confluence_config: Dictionary with Confluence configuration:
+            - url: Confluence instance URL
+            - instance_type: "cloud" or "server"
+            - api_token: API token (optional)
+            - username: Username (optional, for server or cloud)
+            - password: Password or API token (optional)
+        collection_name: Name of the collection (defaults to COLLECTION_NAME)
+        version: Optional version string for version-specific collections
+        overwrite: If True, delete existing collection before embedding
+        
+    Returns:
+        Chroma: ChromaDB instance
+    """
+    # Initialize Confluence integration
+    confluence = _confluence_from_config(confluence_config)
+    
+    # Determine collection name
+    if version:
+        final_collection_name = f"{collection_name or COLLECTION_NAME}-v{version}"
+    else:
+        final_collection_name = collection_name or COLLECTION_NAME
+    
+    # Fetch the page with expanded content
+    page = confluence.fetch_page(page_id, expand="body.storage,space,version")
+    start_time = time.time()
+    
+    # Split into chunks
+    chunks = _chunk_confluence_page(confluence, page, page_id, version)
+    logger.info(f"Embedding Confluence page: {page.get('title') or page_id} into collection: {final_collection_name}")
     
     # Create embeddings
-    provider_config = get_active_embedding_provider()
-    embedding = EmbeddingProviderFactory.get_embeddings(provider_config['type'], provider_config)
+    embedding = get_document_embedding()
     
     # Handle collection creation or update
     if overwrite:
         logger.info(f"Overwrite mode: deleting existing collection {final_collection_name}")
-        # Delete existing collection if it exists
-        try:
-            existing_db = Chroma(
-                collection_name=final_collection_name,
-                persist_directory=CHROMA_PATH,
-                embedding_function=embedding
-            )
-            existing_db.delete_collection()
-            logger.info(f"Deleted existing collection: {final_collection_name}")
-        except Exception as e:
-            logger.debug(f"Collection {final_collection_name} does not exist or error deleting: {e}")
+        _delete_collection_if_exists(final_collection_name)
         
         # After deletion, always create new collection
+        ids, unique_chunks = _unique_chunks(chunks)
         db = Chroma.from_documents(
-            chunks,
+            unique_chunks,
             embedding,
+            ids=ids,
             collection_name=final_collection_name,
-            persist_directory=CHROMA_PATH
+            client=get_chroma_client()
         )
         logger.info(f"Created new collection: {final_collection_name} with {len(chunks)} chunks")
     else:
@@ -319,18 +788,21 @@ def embed_confluence_page(page_id: str, confluence_config: Dict[str, Any],
         if collection_exists:
             # Incremental update: add documents to existing collection
             logger.info(f"Incremental update: adding {len(chunks)} chunks to existing collection")
-            db.add_documents(chunks)
+            _bulk_add(db, chunks)
             logger.info(f"Added {len(chunks)} chunks to collection: {final_collection_name}")
         else:
             # Create new collection with documents
             logger.info(f"Creating new collection: {final_collection_name}")
+            ids, unique_chunks = _unique_chunks(chunks)
             db = Chroma.from_documents(
-                chunks,
+                unique_chunks,
                 embedding,
+                ids=ids,
                 collection_name=final_collection_name,
-                persist_directory=CHROMA_PATH
+                client=get_chroma_client()
             )
             logger.info(f"Created new collection: {final_collection_name} with {len(chunks)} chunks")
+    invalidate_collection_count(final_collection_name)
     
     # Log to monitoring
     duration = time.time() - start_time
@@ -348,16 +820,25 @@ def embed_confluence_page(page_id: str, confluence_config: Dict[str, Any],
 
 
 def embed_confluence_pages(page_ids: list, confluence_config: Dict[str, Any],
-                          collection_name=None, version=None, overwrite=False) -> Dict[str, Any]:
+                          collection_name=None, version=None, overwrite=False,
+                          executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, Any]:
     """
     Embed multiple Confluence pages into ChromaDB.
     
+    Pages are fetched on the shared pool in CQL_BATCH_SIZE slices through
+    ConfluenceIntegration.fetch_pages, while the calling thread splits each
+    slice as it completes and buffers the chunks, writing them with
+    _bulk_add whenever CONFLUENCE_FLUSH_CHUNKS have accumulated. Fetching keeps
+    running while a batch is embedded, so Confluence round trips and embedding
+    overlap. Errors are reported in the order of page_ids.
+    
     Args:
         page_ids: List of Confluence page IDs or URLs
         confluence_config: Dictionary with Confluence configuration
         collection_name: Name of the collection
         version: Optional version string
-        overwrite: If True, delete existing collection before embedding
+        overwrite: Ignored; batches are always added incrementally
+        executor: Thread pool to fetch pages on (defaults to the shared pool)
         
     Returns:
         dict: Summary of embedding operations
@@ -367,21 +848,83 @@ def embed_confluence_pages(page_ids: list, confluence_config: Dict[str, Any],
         'failed': 0,
         'errors': []
     }
+    if not page_ids:
+        return results
     
-    for page_id in page_ids:
+    if version:
+        final_collection_name = f"{collection_name or COLLECTION_NAME}-v{version}"
+    else:
+        final_collection_name = collection_name or COLLECTION_NAME
+    
+    confluence = _confluence_from_config(confluence_config)
+    embedding = get_document_embedding()
+    db, _ = get_or_create_collection_helper(collection_name or COLLECTION_NAME, embedding, version)
+    if db is None:
+        raise RuntimeError(f"Could not open collection: {final_collection_name}")
+    
+    monitor = get_embedding_monitor()
+    errors = {}
+    buffer = []
+    buffered_pages = []  # (page_id, chunk count, fetch completion time) of the pages in buffer
+    
+    def flush():
         try:
-            embed_confluence_page(
-                page_id, 
-                confluence_config, 
-                collection_name, 
-                version, 
-                overwrite=False  # Always incremental for batch
-            )
-            results['success'] += 1
+            _bulk_add(db, list(buffer))
         except Exception as e:
-            logger.error(f"Failed to embed Confluence page {page_id}: {e}")
+            for page_id, _, _ in buffered_pages:
+                errors[page_id] = str(e)
+        else:
+            for page_id, chunk_count, page_start in buffered_pages:
+                monitor.log_embedding(
+                    f"confluence:{page_id}",
+                    version=version,
+                    collection_name=final_collection_name,
+                    chunk_count=chunk_count,
+                    duration=time.time() - page_start,
+                    success=True
+                )
+        buffer.clear()
+        buffered_pages.clear()
+    
+    # fetch_pages batches each slice through one CQL search, falling back to concurrent single fetches
+    executor = executor or get_embed_executor()
+    futures = {
+        executor.submit(confluence.fetch_pages, batch, expand="body.storage,space,version"): batch
+        for batch in (page_ids[i:i + CQL_BATCH_SIZE] for i in range(0, len(page_ids), CQL_BATCH_SIZE))
+    }
+    
+    for future in as_completed(futures):
+        batch = futures[future]
+        fetched_at = time.time()
+        try:
+            pages = {str(page.get('id')): page for page in future.result()}
+        except Exception as e:
+            for page_id in batch:
+                errors[page_id] = str(e)
+            continue
+        
+        for page_id in batch:
+            page = pages.get(confluence.extract_page_id_from_url(page_id))
+            try:
+                chunks = _chunk_confluence_page(confluence, page, page_id, version)
+            except Exception as e:
+                errors[page_id] = str(e)
+                continue
+            buffer.extend(chunks)
+            buffered_pages.append((page_id, len(chunks), fetched_at))
+            if len(buffer) >= CONFLUENCE_FLUSH_CHUNKS:
+                flush()
+    if buffer:
+        flush()
+    invalidate_collection_count(final_collection_name)
+    
+    for page_id in page_ids:
+        if page_id in errors:
+            logger.error(f"Failed to embed Confluence page {page_id}: {errors[page_id]}")
             results['failed'] += 1
-            results['errors'].append({'page_id': page_id, 'error': str(e)})
+            results['errors'].append({'page_id': page_id, 'error': errors[page_id]})
+        else:
+            results['success'] += 1
     
     logger.info(f"Confluence embedding complete: {results['success']} succeeded, {results['failed']} failed")
     return results
@@ -0,0 +1,262 @@
+"""
+Embedding Cache Module
+Persists chunk embeddings by content hash so re-ingested text is not sent to
+the embedding model again, and memoizes recent query embeddings in memory.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Sequence, Tuple, Iterator
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+from langchain_core.stores import ByteStore
+from langchain_classic.embeddings import CacheBackedEmbeddings
+from langchain_classic.storage import LocalFileStore
+from .utils import setup_logging
+
+load_dotenv()
+
+EMBEDDING_CACHE_ENABLED = os.getenv('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true'
+EMBEDDING_CACHE_DIR = Path(os.getenv('EMBEDDING_CACHE_DIR', './.rag_embedding_cache'))
+EMBEDDING_CACHE_MAX_SIZE_MB = int(os.getenv('EMBEDDING_CACHE_MAX_SIZE_MB', 512))  # Oldest entries are pruned above this
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', 256))  # Recent query embeddings kept in memory
+
+logger = setup_logging()
+
+
+class _AtomicLocalFileStore(LocalFileStore):
+    """LocalFileStore whose writes replace files atomically, so readers never see a partial vector."""
+    
+    def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]]) -> None:
+        for key, value in key_value_pairs:
+            full_path = self._get_full_path(key)
+            self._mkdir_for_store(full_path.parent)
+            # Unique per writer; not fsynced, a cache entry lost on crash is simply recomputed
+            tmp_path = full_path.with_name(f"{full_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(value)
+            if self.chmod_file is not None:
+                tmp_path.chmod(self.chmod_file)
+            os.replace(tmp_path, full_path)
+
+
+class EmbeddingCacheStore(ByteStore):
+    """LocalFileStore wrapper that counts hits/misses and bounds total size on disk."""
+
+    def __init__(self, cache_dir: Path = None, max_size_mb: int = None):
+        self.cache_dir = Path(cache_dir or EMBEDDING_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = (max_size_mb or EMBEDDING_CACHE_MAX_SIZE_MB) * 1024 * 1024
+        self._store = _AtomicLocalFileStore(self.cache_dir)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._size = sum(f.stat().st_size for f in self.cache_dir.rglob('*') if f.is_file())
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        values = self._store.mget(keys)
+        found = sum(value is not None for value in values)
+        with self._lock:
+            self.hits += found
+            self.misses += len(values) - found
+        return values
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]]) -> None:
+        self._store.mset(key_value_pairs)
+        with self._lock:
+            self._size += sum(len(value) for _, value in key_value_pairs)
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self._prune()
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        # Keep the running size in step without rescanning the directory
+        removed = 0
+        for key in keys:
+            try:
+                removed += self._store._get_full_path(key).stat().st_size
+            except OSError:
+                pass
+        self._store.mdelete(keys)
+        with self._lock:
+            self._size = max(self._size - removed, 0)
+
+    def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
+        return self._store.yield_keys(prefix=prefix)
+
+    def _prune(self):
+        """Delete the oldest entries until the cache is back under 90% of its limit."""
+        with self._lock:
+            files = [(f.stat(), f) for f in self.cache_dir.rglob('*') if f.is_file()]
+            files.sort(key=lambda item: item[0].st_mtime)
+            size = sum(stat.st_size for stat, _ in files)
+            target = self.max_bytes * 0.9
+            removed = 0
+            for stat, path in files:
+                if size <= target:
+                    break
+                try:
+                    path.unlink()
+                    size -= stat.st_size
+                    removed += 1
+                except OSError:
+                    pass
+            self._size = size
+        logger.info(f"Pruned {removed} embedding cache entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            'enabled': True,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0,
+            'size_mb': round(self._size / (1024 * 1024), 2),
+            'max_size_mb': round(self.max_bytes / (1024 * 1024), 2),
+            'cache_dir': str(self.cache_dir)
+        }
+
+
+# Global embedding cache store
+_store_instance: Optional[EmbeddingCacheStore] = None
+_store_lock = threading.Lock()
+
+
+def get_embedding_cache_store() -> EmbeddingCacheStore:
+    """Get global embedding cache store."""
+    global _store_instance
+    if _store_instance is None:
+        with _store_lock:
+            if _store_instance is None:
+                _store_instance = EmbeddingCacheStore()
+    return _store_instance
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU of query embeddings keyed by (namespace, text)."""
+
+    def __init__(self, max_size: int = None):
+        self.max_size = max_size or QUERY_EMBEDDING_CACHE_SIZE
+        self._entries: 'OrderedDict[Tuple[str, str], List[float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def set(self, key: Tuple[str, str], vector: List[float]):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0
+        }
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings wrapper serving repeated embed_query() calls from a QueryEmbeddingCache."""
+
+    def __init__(self, embedding: Embeddings, namespace: str, cache: QueryEmbeddingCache):
+        self.embedding = embedding
+        self.namespace = namespace
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedding.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = (self.namespace, text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.embedding.embed_query(text)
+            self.cache.set(key, vector)
+        return list(vector)
+
+
+# Global query embedding cache
+_query_cache_instance: Optional[QueryEmbeddingCache] = None
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Get global query embedding cache."""
+    global _query_cache_instance
+    if _query_cache_instance is None:
+        with _store_lock:
+            if _query_cache_instance is None:
+                _query_cache_instance = QueryEmbeddingCache()
+    return _query_cache_instance
+
+
+def _namespace(provider_config: Dict[str, Any]) -> str:
+    """Cache namespace for a provider; switching models never reuses vectors."""
+    namespace = f"{provider_config.get('type', 'unknown')}_{provider_config.get('model', 'default')}_"
+    return re.sub(r'[^a-zA-Z0-9_.-]', '_', namespace)
+
+
+def with_query_embedding_cache(embedding: Embeddings, provider_config: Dict[str, Any]) -> Embeddings:
+    """
+    Wrap an embedding model so repeated query embeddings are served from memory.
+
+    The semantic cache lookup and retrieval both embed the incoming question;
+    with this wrapper the embedding model is called once per question.
+
+    Args:
+        embedding: Underlying embedding model
+        provider_config: Active embedding provider config
+
+    Returns:
+        Embeddings: Wrapped embeddings, or the original if QUERY_EMBEDDING_CACHE_SIZE is 0
+    """
+    if QUERY_EMBEDDING_CACHE_SIZE <= 0:
+        return embedding
+    return CachedQueryEmbeddings(embedding, _namespace(provider_config), get_query_embedding_cache())
+
+
+def with_embedding_cache(embedding: Embeddings, provider_config: Dict[str, Any]) -> Embeddings:
+    """
+    Wrap an embedding model so document embeddings are cached on disk.
+
+    Args:
+        embedding: Underlying embedding model
+        provider_config: Active embedding provider config; its type and model
+            form the cache namespace so switching models never reuses vectors
+
+    Returns:
+        Embeddings: Cache-backed embeddings, or the original if caching is disabled
+    """
+    if not EMBEDDING_CACHE_ENABLED:
+        return embedding
+
+    return CacheBackedEmbeddings.from_bytes_store(
+        embedding,
+        get_embedding_cache_store(),
+        namespace=_namespace(provider_config),
+        key_encoder='blake2b'
+    )
+
+
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    """Get embedding cache statistics, including the in-memory query embedding cache."""
+    stats = get_embedding_cache_store().stats() if EMBEDDING_CACHE_ENABLED else {'enabled': False}
+    stats['query_embeddings'] = get_query_embedding_cache().stats()
+    return stats
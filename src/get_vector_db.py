@@ -3,9 +3,13 @@ Vector Database Module
 Initializes and manages ChromaDB connection with version-aware collections.
 """
 import os
+import threading
+import time
+import chromadb
 from langchain_chroma import Chroma
 from dotenv import load_dotenv
 from .llm_providers import EmbeddingProviderFactory
+from .embedding_cache import with_query_embedding_cache
 from .settings import get_active_embedding_provider
 
 # Load environment variables
@@ -14,6 +18,73 @@ load_dotenv()
 CHROMA_PATH = os.getenv('CHROMA_PATH', 'chroma')
 COLLECTION_NAME = os.getenv('COLLECTION_NAME', 'common-model-docs')
 TEXT_EMBEDDING_MODEL = os.getenv('TEXT_EMBEDDING_MODEL', 'nomic-embed-text')
+COLLECTION_COUNT_TTL = float(os.getenv('COLLECTION_COUNT_TTL', 30))  # Seconds a cached count() stays valid
+
+# Shared ChromaDB client (opened lazily, reused across requests)
+_chroma_client = None
+_chroma_lock = threading.Lock()
+
+
+def get_chroma_client():
+    """
+    Get the shared ChromaDB persistent client.
+    
+    The client is created on first use and reused afterwards so the
+    underlying SQLite store and collection metadata are opened only once.
+    
+    Returns:
+        chromadb.PersistentClient: Shared client for CHROMA_PATH
+    """
+    global _chroma_client
+    if _chroma_client is None:
+        with _chroma_lock:
+            if _chroma_client is None:
+                _chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
+    return _chroma_client
+
+
+# Cached collection.count() results: collection name -> (count, monotonic time)
+_collection_counts = {}
+_collection_counts_lock = threading.Lock()
+
+
+def get_collection_count(collection) -> int:
+    """
+    Get a collection's document count, cached for COLLECTION_COUNT_TTL seconds.
+    
+    Writes made through this process invalidate the cached value; the TTL
+    bounds staleness for writes made by other workers.
+    
+    Args:
+        collection: Chroma collection
+        
+    Returns:
+        int: Number of documents in the collection
+    """
+    now = time.monotonic()
+    with _collection_counts_lock:
+        cached = _collection_counts.get(collection.name)
+    if cached is not None and now - cached[1] < COLLECTION_COUNT_TTL:
+        return cached[0]
+    
+    count = collection.count()
+    with _collection_counts_lock:
+        _collection_counts[collection.name] = (count, now)
+    return count
+
+
+def invalidate_collection_count(collection_name=None):
+    """
+    Drop cached document counts after a collection is modified.
+    
+    Args:
+        collection_name: Collection to invalidate, or None for all collections
+    """
+    with _collection_counts_lock:
+        if collection_name is None:
+            _collection_counts.clear()
+        else:
+            _collection_counts.pop(collection_name, None)
 
 
 def get_vector_db(collection_name=None, version=None):
@@ -33,14 +104,17 @@ def get_vector_db(collection_name=None, version=None):
     else:
         final_collection_name = collection_name or COLLECTION_NAME
     
-    # Initialize embedding function
+    # Initialize embedding function; query embeddings are shared with the semantic cache lookup
     provider_config = get_active_embedding_provider()
-    embedding = EmbeddingProviderFactory.get_embeddings(provider_config['type'], provider_config)
+    embedding = with_query_embedding_cache(
+        EmbeddingProviderFactory.get_embeddings(provider_config['type'], provider_config),
+        provider_config
+    )
     
     # Create or load ChromaDB instance
     db = Chroma(
         collection_name=final_collection_name,
-        persist_directory=CHROMA_PATH,
+        client=get_chroma_client(),
         embedding_function=embedding
     )
     
@@ -69,7 +143,7 @@ def get_or_create_collection(collection_name, embedding_function, version=None):
         # Try to load existing collection
         db = Chroma(
             collection_name=final_collection_name,
-            persist_directory=CHROMA_PATH,
+            client=get_chroma_client(),
             embedding_function=embedding_function
         )
         # Verify collection exists by checking if it has any documents
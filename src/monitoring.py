@@ -4,10 +4,11 @@ Tracks query patterns, embedding operations, and system metrics.
 """
 import os
 import json
+import threading
 import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
 from collections import defaultdict
 from dotenv import load_dotenv
 from .utils import setup_logging
@@ -16,10 +17,51 @@ load_dotenv()
 
 MONITORING_DIR = Path(os.getenv('MONITORING_DIR', './.rag_monitoring'))
 MONITORING_ENABLED = os.getenv('MONITORING_ENABLED', 'true').lower() == 'true'
+MONITORING_STATS_TTL = float(os.getenv('MONITORING_STATS_TTL', 60))  # Seconds a stats snapshot is reused
 
 logger = setup_logging()
 
 
+class StatsSnapshots:
+    """Recently computed statistics per period, so repeated requests don't rescan the log."""
+    
+    MAX_ENTRIES = 8
+    
+    def __init__(self, ttl: float = None):
+        self.ttl = MONITORING_STATS_TTL if ttl is None else ttl
+        self._entries: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, days: int, compute: Callable[[int], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Get the snapshot for a period, computing it if missing or older than the TTL.
+        
+        Args:
+            days: Number of days analyzed
+            compute: Function computing the statistics for a period
+            
+        Returns:
+            Dictionary with statistics
+        """
+        if self.ttl <= 0:
+            return compute(days)
+        
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(days)
+        if entry is not None and entry[0] > now:
+            return dict(entry[1])
+        
+        stats = compute(days)
+        if stats:  # Failed computations return {} and are retried next time
+            with self._lock:
+                self._entries.pop(days, None)
+                self._entries[days] = (now + self.ttl, stats)
+                while len(self._entries) > self.MAX_ENTRIES:
+                    del self._entries[next(iter(self._entries))]
+        return dict(stats)
+
+
 class QueryMonitor:
     """Monitor and track query patterns."""
     
@@ -28,6 +70,7 @@ class QueryMonitor:
         self.monitoring_dir.mkdir(parents=True, exist_ok=True)
         self.queries_file = self.monitoring_dir / 'queries.jsonl'
         self.stats_file = self.monitoring_dir / 'stats.json'
+        self._snapshots = StatsSnapshots()
     
     def log_query(self, query: str, version: str = None, response_time: float = None, 
                   source_count: int = 0, cached: bool = False):
@@ -64,12 +107,18 @@ class QueryMonitor:
         """
         Get query statistics for the last N days.
         
+        Snapshots are reused for MONITORING_STATS_TTL seconds.
+        
         Args:
             days: Number of days to analyze
             
         Returns:
             Dictionary with statistics
         """
+        return self._snapshots.get(days, self._compute_query_stats)
+    
+    def _compute_query_stats(self, days: int) -> Dict[str, Any]:
+        """Scan the query log for the last N days."""
         if not self.queries_file.exists():
             return {
                 'total_queries': 0,
@@ -132,6 +181,7 @@ class EmbeddingMonitor:
         self.monitoring_dir = Path(monitoring_dir or MONITORING_DIR)
         self.monitoring_dir.mkdir(parents=True, exist_ok=True)
         self.embeddings_file = self.monitoring_dir / 'embeddings.jsonl'
+        self._snapshots = StatsSnapshots()
     
     def log_embedding(self, file_path: str, version: str = None, 
                      collection_name: str = None, chunk_count: int = 0,
@@ -171,12 +221,18 @@ class EmbeddingMonitor:
         """
         Get embedding statistics for the last N days.
         
+        Snapshots are reused for MONITORING_STATS_TTL seconds.
+        
         Args:
             days: Number of days to analyze
             
         Returns:
             Dictionary with statistics
         """
+        return self._snapshots.get(days, self._compute_embedding_stats)
+    
+    def _compute_embedding_stats(self, days: int) -> Dict[str, Any]:
+        """Scan the embedding log for the last N days."""
         if not self.embeddings_file.exists():
             return {
                 'total_embeddings': 0,
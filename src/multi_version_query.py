@@ -2,6 +2,7 @@
 Multi-Version Query Module
 Enables querying across multiple documentation versions simultaneously.
 """
+import asyncio
 import os
 from typing import List, Dict, Any, Optional
 from langchain_core.prompts import PromptTemplate
@@ -14,8 +15,9 @@ from .get_vector_db import get_vector_db
 from .utils import setup_logging
 from .cache import get_cache
 from .monitoring import get_query_monitor
-from .llm_providers import LLMProviderFactory
-from .settings import get_active_llm_provider
+from .llm_providers import LLMProviderFactory, EmbeddingProviderFactory
+from .embedding_cache import with_query_embedding_cache
+from .settings import get_active_llm_provider, get_active_embedding_provider
 import time
 
 load_dotenv()
@@ -98,27 +100,18 @@ def query_multiple_versions(question: str, versions: List[str],
     
     prompt = PromptTemplate.from_template(template)
     
-    # Create QA chain using LCEL pattern
-    from langchain_core.runnables import RunnablePassthrough
-    from langchain_core.output_parsers import StrOutputParser
-    
     def format_docs(docs):
         return "\n\n".join(doc.page_content for doc in docs)
     
-    # Create QA chain using LCEL
-    rag_chain = (
-        {"context": ensemble_retriever | format_docs, "question": RunnablePassthrough()}
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
+    # Answer from the documents retrieved below rather than retrieving again
+    answer_chain = prompt | llm | StrOutputParser()
     
     try:
         # Get source documents - try different methods based on LangChain version
         source_docs = None
         try:
-            # Try invoke() first (LangChain 1.0+)
-            source_docs = ensemble_retriever.invoke(question)
+            # ainvoke() searches all version retrievers concurrently (LangChain 1.0+)
+            source_docs = asyncio.run(ensemble_retriever.ainvoke(question))
         except (AttributeError, TypeError):
             try:
                 # Try get_relevant_documents (older API)
@@ -137,7 +130,7 @@ def query_multiple_versions(question: str, versions: List[str],
                         except:
                             pass
         
-        answer = rag_chain.invoke(question)
+        answer = answer_chain.invoke({"context": format_docs(source_docs), "question": question})
         
         result = {
             "result": answer,
@@ -216,34 +209,89 @@ def compare_versions(question: str, versions: List[str],
     
     logger.info(f"Comparing versions for query: {question[:100]}...")
     
+    from .query import get_prompt
+    
+    cache = get_cache()
+    monitor = get_query_monitor()
     results_by_version = {}
     
+    def cache_version(version):
+        # Scoped apart from query_docs entries, whose answers come from multi-query retrieval
+        return f"compare:{collection_name or ''}:{version}"
+    
     for version in versions:
+        lookup_start = time.time()
+        cached_result = cache.get(question, cache_version(version), k)
+        if cached_result:
+            results_by_version[version] = cached_result
+            monitor.log_query(question, version, response_time=time.time() - lookup_start,
+                              source_count=cached_result.get('source_count', 0), cached=True)
+    pending = [version for version in versions if version not in results_by_version]
+    
+    async def answer_version(version, query_embedding, answer_chain):
+        version_start = time.time()
         try:
-            from .query import query_docs
-            result = query_docs(question, collection_name=collection_name, 
-                             version=version, k=k, use_cache=True)
-            results_by_version[version] = {
-                'answer': result['result'],
-                'source_count': len(result.get('source_documents', [])),
+            db = get_vector_db(collection_name=collection_name, version=version)
+            source_docs = await db.asimilarity_search_by_vector(query_embedding, k=k)
+            answer = await answer_chain.ainvoke({
+                "context": "\n\n".join(doc.page_content for doc in source_docs),
+                "question": question
+            })
+            result = {
+                'answer': answer,
+                'source_count': len(source_docs),
                 'sources': [
                     {
                         'content': doc.page_content[:300],
                         'metadata': doc.metadata
                     }
-                    for doc in result.get('source_documents', [])[:3]  # Top 3 per version
+                    for doc in source_docs[:3]  # Top 3 per version
                 ]
             }
         except Exception as e:
             logger.warning(f"Failed to query version {version}: {e}")
-            results_by_version[version] = {
+            return version, {
                 'error': str(e),
                 'answer': None
             }
+        
+        cache.set(question, result, cache_version(version), k)
+        monitor.log_query(question, version, response_time=time.time() - version_start,
+                          source_count=result['source_count'], cached=False)
+        return version, result
+    
+    async def answer_all(query_embedding, answer_chain):
+        return await asyncio.gather(*(
+            answer_version(version, query_embedding, answer_chain) for version in pending
+        ))
+    
+    if pending:
+        try:
+            # Embed the question once and search every version collection with the same vector
+            embedding_config = get_active_embedding_provider()
+            embedding = with_query_embedding_cache(
+                EmbeddingProviderFactory.get_embeddings(embedding_config['type'], embedding_config),
+                embedding_config
+            )
+            query_embedding = embedding.embed_query(question)
+            
+            provider_config = get_active_llm_provider()
+            llm = LLMProviderFactory.get_llm(provider_config['type'], provider_config)
+            _, prompt = get_prompt()
+            answer_chain = prompt | llm | StrOutputParser()
+        except Exception as e:
+            logger.warning(f"Failed to prepare version comparison: {e}")
+            for version in pending:
+                results_by_version[version] = {
+                    'error': str(e),
+                    'answer': None
+                }
+        else:
+            # Versions are answered concurrently, so latency tracks the slowest version
+            results_by_version.update(asyncio.run(answer_all(query_embedding, answer_chain)))
     
     return {
         'query': question,
         'versions_compared': versions,
-        'results_by_version': results_by_version
+        'results_by_version': {version: results_by_version[version] for version in versions}
     }
-
@@ -3,54 +3,95 @@ Query History Module
 Tracks and manages query history with favorites support.
 """
 import os
+import csv
+import io
 import json
+import sqlite3
+import orjson
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from dotenv import load_dotenv
-from .utils import setup_logging
+from .utils import ThreadLocalSQLite, row_to_dict, setup_logging
 
 load_dotenv()
 
 HISTORY_DIR = Path(os.getenv('HISTORY_DIR', './.rag_history'))
-HISTORY_FILE = HISTORY_DIR / 'queries.json'
+HISTORY_DB = HISTORY_DIR / 'queries.db'
+HISTORY_FILE = HISTORY_DIR / 'queries.json'  # Legacy store, imported into HISTORY_DB once
 FAVORITES_FILE = HISTORY_DIR / 'favorites.json'
 MAX_HISTORY = int(os.getenv('MAX_HISTORY', 1000))
+EXPORT_CHUNK_ROWS = 256  # Entries per fragment yielded by iter_export
 
 logger = setup_logging()
 
 
+def _add_functions(conn: sqlite3.Connection):
+    """Register the SQL functions history queries use on a new connection."""
+    # Python's lower() so searches match the same entries as before the SQLite store
+    conn.create_function('py_lower', 1, lambda text: text.lower() if text else '', deterministic=True)
+
+
 class QueryHistory:
     """Manage query history and favorites."""
     
     def __init__(self):
         HISTORY_DIR.mkdir(parents=True, exist_ok=True)
+        self.db_file = HISTORY_DB
         self.history_file = HISTORY_FILE
         self.favorites_file = FAVORITES_FILE
-        self._load_history()
+        self._db = ThreadLocalSQLite(self.db_file, row_factory=row_to_dict, on_connect=_add_functions)
+        self._init_db()
         self._load_favorites()
     
-    def _load_history(self) -> List[Dict[str, Any]]:
-        """Load query history from file."""
+    def _init_db(self):
+        """Create the history table and import the legacy JSON history if present."""
+        conn = self._db.connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                answer TEXT,
+                version TEXT,
+                response_time REAL,
+                source_count INTEGER
+            )
+        ''')
+        
         if not self.history_file.exists():
-            return []
+            return
         
         try:
             with open(self.history_file, 'r') as f:
-                return json.load(f)
+                legacy = json.load(f)
         except (json.JSONDecodeError, IOError) as e:
-            logger.warning(f"Error loading history: {e}")
-            return []
-    
-    def _save_history(self, history: List[Dict[str, Any]]):
-        """Save query history to file."""
+            logger.warning(f"Error loading legacy history: {e}")
+            return
+        
+        # BEGIN IMMEDIATE takes the write lock, so only one worker imports the file
+        conn.execute('BEGIN IMMEDIATE')
         try:
-            # Keep only last MAX_HISTORY entries
-            history = history[-MAX_HISTORY:]
-            with open(self.history_file, 'w') as f:
-                json.dump(history, f, indent=2)
-        except IOError as e:
-            logger.error(f"Error saving history: {e}")
+            if conn.execute('SELECT 1 FROM history LIMIT 1').fetchone() is None:
+                conn.executemany(
+                    'INSERT INTO history (query, timestamp, answer, version, response_time, source_count) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    [(entry.get('query', ''), entry.get('timestamp', ''), entry.get('answer'),
+                      entry.get('version'), entry.get('response_time'), entry.get('source_count', 0))
+                     for entry in legacy[-MAX_HISTORY:]]
+                )
+                logger.info(f"Imported {min(len(legacy), MAX_HISTORY)} history entries from {self.history_file}")
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+        
+        try:
+            self.history_file.rename(self.history_file.with_suffix('.json.bak'))
+        except OSError:
+            # Another worker already moved it
+            pass
     
     def _load_favorites(self) -> List[str]:
         """Load favorites list from file."""
@@ -84,20 +125,22 @@ class QueryHistory:
             response_time: Response time in seconds (optional)
             source_count: Number of sources (optional)
         """
-        history = self._load_history()
-        
-        entry = {
-            'id': len(history) + 1,
-            'query': query,
-            'timestamp': datetime.now().isoformat(),
-            'answer': answer,
-            'version': version,
-            'response_time': response_time,
-            'source_count': source_count
-        }
-        
-        history.append(entry)
-        self._save_history(history)
+        conn = self._db.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            cursor = conn.execute(
+                'INSERT INTO history (query, timestamp, answer, version, response_time, source_count) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (query, datetime.now().isoformat(), answer, version, response_time, source_count)
+            )
+            # Ids are contiguous, so this keeps exactly the last MAX_HISTORY entries
+            conn.execute('DELETE FROM history WHERE id <= ?', (cursor.lastrowid - MAX_HISTORY,))
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            logger.error(f"Error saving history: {e}")
+            return
         logger.debug(f"Added query to history: {query[:50]}...")
     
     def get_history(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
@@ -111,9 +154,21 @@ class QueryHistory:
         Returns:
             List of history entries
         """
-        history = self._load_history()
+        rows = self._db.connect().execute(
+            'SELECT * FROM history ORDER BY id LIMIT ? OFFSET ?', (limit, offset)
+        ).fetchall()
         # Return in reverse chronological order
-        return list(reversed(history[offset:offset+limit]))
+        rows.reverse()
+        return rows
+    
+    def count(self) -> int:
+        """
+        Get the number of history entries.
+        
+        Returns:
+            int: Total number of stored queries
+        """
+        return self._db.connect().execute('SELECT COUNT(*) AS total FROM history').fetchone()['total']
     
     def search_history(self, search_term: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
@@ -126,15 +181,11 @@ class QueryHistory:
         Returns:
             List of matching history entries
         """
-        history = self._load_history()
-        search_term_lower = search_term.lower()
-        
-        matches = [
-            entry for entry in history
-            if search_term_lower in entry.get('query', '').lower()
-        ]
-        
-        return list(reversed(matches[-limit:]))
+        # Newest first, stopping as soon as enough matches are found
+        return self._db.connect().execute(
+            'SELECT * FROM history WHERE instr(py_lower(query), ?) > 0 ORDER BY id DESC LIMIT ?',
+            (search_term.lower(), limit)
+        ).fetchall()
     
     def add_favorite(self, query: str):
         """Add a query to favorites."""
@@ -162,7 +213,7 @@ class QueryHistory:
     
     def clear_history(self):
         """Clear all query history."""
-        self._save_history([])
+        self._db.connect().execute('DELETE FROM history')
         logger.info("Query history cleared")
     
     def export_history(self, format: str = 'json') -> str:
@@ -175,29 +226,78 @@ class QueryHistory:
         Returns:
             Exported data as string
         """
-        history = self._load_history()
+        return ''.join(self.iter_export(format))
+    
+    def iter_export(self, format: str = 'json') -> Iterator[str]:
+        """
+        Export query history incrementally, one entry at a time.
         
+        Args:
+            format: Export format ('json' or 'csv')
+            
+        Returns:
+            Iterator of string fragments that concatenate to the full export
+            
+        Raises:
+            ValueError: If the format is not supported (raised immediately,
+                before any output is produced)
+        """
         if format == 'json':
-            return json.dumps(history, indent=2)
+            return self._iter_json(self._iter_rows())
         elif format == 'csv':
-            import csv
-            import io
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=['id', 'timestamp', 'query', 'version', 
-                                                       'response_time', 'source_count'])
-            writer.writeheader()
-            for entry in history:
-                writer.writerow({
-                    'id': entry.get('id', ''),
-                    'timestamp': entry.get('timestamp', ''),
-                    'query': entry.get('query', ''),
-                    'version': entry.get('version', ''),
-                    'response_time': entry.get('response_time', ''),
-                    'source_count': entry.get('source_count', '')
-                })
-            return output.getvalue()
+            return self._iter_csv(self._iter_rows())
         else:
             raise ValueError(f"Unsupported format: {format}")
+    
+    def _iter_rows(self) -> Iterator[Dict[str, Any]]:
+        """Yield history entries oldest first without loading them all at once."""
+        # A dedicated connection, since the generator may outlive other statements on this thread
+        conn = sqlite3.connect(self.db_file, timeout=10)
+        conn.row_factory = row_to_dict
+        try:
+            yield from conn.execute('SELECT * FROM history ORDER BY id')
+        finally:
+            conn.close()
+    
+    def _iter_json(self, history: Iterator[Dict[str, Any]]) -> Iterator[str]:
+        """Yield history as a JSON array, EXPORT_CHUNK_ROWS elements per fragment."""
+        yield '['
+        separator = ''
+        for batch in self._batched(history):
+            yield separator + ','.join(orjson.dumps(entry).decode('utf-8') for entry in batch)
+            separator = ','
+        yield ']'
+    
+    def _iter_csv(self, history: Iterator[Dict[str, Any]]) -> Iterator[str]:
+        """Yield history as CSV, EXPORT_CHUNK_ROWS rows per fragment."""
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=['id', 'timestamp', 'query', 'version', 
+                                                   'response_time', 'source_count'],
+                                extrasaction='ignore')
+        
+        def flush():
+            rows = output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+            return rows
+        
+        writer.writeheader()
+        yield flush()
+        for batch in self._batched(history):
+            writer.writerows(batch)
+            yield flush()
+    
+    @staticmethod
+    def _batched(history: Iterator[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """Group entries into lists of up to EXPORT_CHUNK_ROWS."""
+        batch = []
+        for entry in history:
+            batch.append(entry)
+            if len(batch) >= EXPORT_CHUNK_ROWS:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
 
 # Global history instance
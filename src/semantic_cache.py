@@ -0,0 +1,203 @@
+"""
+Semantic Query Cache Module
+Caches query responses by question embedding so paraphrased questions can be
+answered without repeating retrieval and answer generation.
+"""
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Hashable
+import numpy as np
+from dotenv import load_dotenv
+from .utils import setup_logging
+from .cache import CACHE_TTL
+from .llm_providers import EmbeddingProviderFactory
+from .embedding_cache import with_query_embedding_cache
+from .settings import get_active_embedding_provider
+
+load_dotenv()
+
+# Opt-in: a paraphrase match can return the answer to a neighbouring question
+SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'false').lower() == 'true'
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.95))  # Minimum cosine similarity
+SEMANTIC_CACHE_MAX_SIZE = int(os.getenv('SEMANTIC_CACHE_MAX_SIZE', 256))  # Maximum number of cached responses
+SEMANTIC_CACHE_INT8 = os.getenv('SEMANTIC_CACHE_INT8', 'false').lower() == 'true'  # Store keys quantized to int8
+
+logger = setup_logging()
+
+
+def _normalize(embedding) -> np.ndarray:
+    """Return the embedding as a contiguous, L2-normalized float32 vector."""
+    vector = np.ascontiguousarray(embedding, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return vector
+
+
+def _quantize(vector: np.ndarray):
+    """
+    Symmetrically quantize a vector to int8.
+
+    Args:
+        vector: float32 vector
+
+    Returns:
+        tuple: (int8 vector, float32 scale) such that vector ~= int8 * scale
+    """
+    scale = float(np.abs(vector).max()) / 127.0
+    if scale == 0:
+        return np.zeros(vector.shape, dtype=np.int8), np.float32(0)
+    return np.round(vector / scale).astype(np.int8), np.float32(scale)
+
+
+class SemanticCache:
+    """In-memory LRU cache with TTL mapping query embeddings to responses."""
+
+    def __init__(self, max_size: int = None, threshold: float = None, quantize: bool = None, ttl: int = None):
+        self.max_size = max_size or SEMANTIC_CACHE_MAX_SIZE
+        self.ttl = ttl or CACHE_TTL
+        self.threshold = threshold if threshold is not None else SEMANTIC_CACHE_THRESHOLD
+        self.quantize = SEMANTIC_CACHE_INT8 if quantize is None else quantize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._reset(0)
+
+    def _reset(self, dimension: int):
+        """Drop all entries and allocate storage for embeddings of the given dimension."""
+        self._keys = np.zeros((self.max_size, dimension), dtype=np.int8 if self.quantize else np.float32)
+        self._scales = np.zeros(self.max_size, dtype=np.float32)
+        self._context_ids = np.zeros(self.max_size, dtype=np.int64)
+        self._last_used = np.zeros(self.max_size, dtype=np.int64)
+        self._stored_at = np.zeros(self.max_size, dtype=np.float64)
+        self._values = [None] * self.max_size
+        self._size = 0
+        self._clock = 0
+
+    def get(self, embedding, context: Hashable = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached response for the most similar previous query.
+
+        Args:
+            embedding: Query embedding vector
+            context: Hashable scope (e.g. collection/version/k); only entries
+                stored with the same context can match
+
+        Returns:
+            Cached response dict or None if no unexpired entry is similar enough
+        """
+        query = _normalize(embedding)
+
+        with self._lock:
+            if self._size == 0 or query.shape[0] != self._keys.shape[1]:
+                self.misses += 1
+                return None
+
+            # Keys are stored L2-normalized, so a single GEMV yields cosine similarities
+            if self.quantize:
+                query_i8, query_scale = _quantize(query)
+                dots = np.einsum('ij,j->i', self._keys[:self._size], query_i8, dtype=np.int32)
+                scores = dots * self._scales[:self._size] * query_scale
+            else:
+                scores = self._keys[:self._size] @ query
+            scores[self._context_ids[:self._size] != hash(context)] = -1.0
+            scores[time.monotonic() - self._stored_at[:self._size] > self.ttl] = -1.0
+
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self._clock += 1
+            self._last_used[best] = self._clock
+            self.hits += 1
+            logger.debug(f"Semantic cache hit (similarity {scores[best]:.3f})")
+            return self._values[best]
+
+    def set(self, embedding, value: Dict[str, Any], context: Hashable = None):
+        """
+        Cache a response under its query embedding.
+
+        Args:
+            embedding: Query embedding vector
+            value: Response to cache
+            context: Hashable scope the response belongs to
+        """
+        key = _normalize(embedding)
+
+        with self._lock:
+            if key.shape[0] != self._keys.shape[1]:
+                # First entry, or the embedding model changed dimension
+                self._reset(key.shape[0])
+
+            if self._size < self.max_size:
+                slot = self._size
+                self._size += 1
+            else:
+                # Evict the least recently used entry
+                slot = int(np.argmin(self._last_used))
+
+            self._clock += 1
+            if self.quantize:
+                self._keys[slot], self._scales[slot] = _quantize(key)
+            else:
+                self._keys[slot] = key
+            self._context_ids[slot] = hash(context)
+            self._last_used[slot] = self._clock
+            self._stored_at[slot] = time.monotonic()
+            self._values[slot] = value
+
+    def clear(self):
+        """Clear all cache entries."""
+        with self._lock:
+            entries = self._size
+            self._reset(self._keys.shape[1])
+        logger.info(f"Cleared {entries} semantic cache entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': self._size,
+            'max_size': self.max_size,
+            'threshold': self.threshold,
+            'ttl_seconds': self.ttl,
+            'quantized': self.quantize,
+            'key_bytes': int(self._keys.nbytes),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0
+        }
+
+
+def embed_query(text: str) -> np.ndarray:
+    """
+    Embed a query with the active embedding provider.
+
+    The vector is memoized, so retrieval for the same question reuses it.
+
+    Args:
+        text: Query text
+
+    Returns:
+        np.ndarray: Query embedding as float32
+    """
+    provider_config = get_active_embedding_provider()
+    embedding = with_query_embedding_cache(
+        EmbeddingProviderFactory.get_embeddings(provider_config['type'], provider_config),
+        provider_config
+    )
+    return np.asarray(embedding.embed_query(text), dtype=np.float32)
+
+
+# Global semantic cache instance
+_semantic_cache_instance: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get global semantic cache instance."""
+    global _semantic_cache_instance
+    if _semantic_cache_instance is None:
+        _semantic_cache_instance = SemanticCache()
+    return _semantic_cache_instance
@@ -0,0 +1,134 @@
+"""
+Background Tasks Module
+Runs long-running ingestion jobs off the request thread and tracks their status.
+"""
+import os
+import time
+import uuid
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional
+from dotenv import load_dotenv
+from .utils import ThreadLocalSQLite, row_to_dict, setup_logging
+
+load_dotenv()
+
+TASK_WORKERS = int(os.getenv('TASK_WORKERS', 2))  # Ingestion jobs run concurrently
+TASK_HISTORY_SIZE = int(os.getenv('TASK_HISTORY_SIZE', 256))  # Finished tasks kept for polling
+TASK_DIR = Path(os.getenv('TASK_DIR', './.rag_tasks'))
+TASK_DB = TASK_DIR / 'tasks.db'  # Shared by every worker process, so any worker can answer a poll
+
+logger = setup_logging()
+
+
+def _row_to_task(cursor, row) -> Dict[str, Any]:
+    """sqlite3 row factory returning task rows as status dicts."""
+    task = row_to_dict(cursor, row)
+    if task.get('result') is not None:
+        task['result'] = orjson.loads(task['result'])
+    return task
+
+
+class TaskManager:
+    """Thread pool running background tasks, with a status table in SQLite."""
+
+    def __init__(self, max_workers: int = None, history_size: int = None, db_file: Path = None):
+        self.history_size = history_size or TASK_HISTORY_SIZE
+        self.db_file = Path(db_file or TASK_DB)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or TASK_WORKERS,
+                                            thread_name_prefix='task')
+        self._db = ThreadLocalSQLite(self.db_file, row_factory=_row_to_task)
+        self._init_db()
+
+    def _init_db(self):
+        """Create the task table."""
+        conn = self._db.connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                submitted_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT
+            )
+        ''')
+
+    def submit(self, task_type: str, fn: Callable, *args, **kwargs) -> str:
+        """
+        Run fn(*args, **kwargs) in the background.
+
+        Args:
+            task_type: Short label reported with the task status (e.g. 'embed')
+            fn: Callable to run; its JSON-serializable return value becomes the task result
+
+        Returns:
+            str: Task ID for get()
+        """
+        task_id = uuid.uuid4().hex
+        conn = self._db.connect()
+        conn.execute(
+            "INSERT INTO tasks (task_id, type, status, submitted_at) VALUES (?, ?, 'pending', ?)",
+            (task_id, task_type, time.time())
+        )
+        self._prune()
+        self._executor.submit(self._run, task_id, fn, args, kwargs)
+        logger.info(f"Queued {task_type} task {task_id}")
+        return task_id
+
+    def _run(self, task_id: str, fn: Callable, args, kwargs):
+        """Execute a task and record its outcome."""
+        self._update(task_id, status='running', started_at=time.time())
+        try:
+            result = fn(*args, **kwargs)
+            self._update(task_id, status='completed', result=orjson.dumps(result).decode(),
+                         finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Task {task_id} failed: {e}")
+            self._update(task_id, status='failed', error=str(e), finished_at=time.time())
+
+    def _update(self, task_id: str, **fields):
+        columns = ', '.join(f"{column} = ?" for column in fields)
+        self._db.connect().execute(f"UPDATE tasks SET {columns} WHERE task_id = ?", (*fields.values(), task_id))
+
+    def _prune(self):
+        """Forget the oldest finished tasks beyond history_size."""
+        conn = self._db.connect()
+        excess = conn.execute('SELECT COUNT(*) AS n FROM tasks').fetchone()['n'] - self.history_size
+        if excess <= 0:
+            return
+        conn.execute(
+            "DELETE FROM tasks WHERE task_id IN ("
+            "SELECT task_id FROM tasks WHERE status IN ('completed', 'failed') "
+            "ORDER BY submitted_at LIMIT ?)",
+            (excess,)
+        )
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a task's status.
+
+        Args:
+            task_id: ID returned by submit(), by this or any other worker process
+
+        Returns:
+            Task status dict, or None if unknown
+        """
+        return self._db.connect().execute('SELECT * FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+
+
+# Global task manager instance
+_task_manager_instance: Optional[TaskManager] = None
+
+
+def get_task_manager() -> TaskManager:
+    """Get global task manager instance."""
+    global _task_manager_instance
+    if _task_manager_instance is None:
+        _task_manager_instance = TaskManager()
+    return _task_manager_instance
@@ -3,8 +3,10 @@ Utility Functions
 Helper functions for common operations.
 """
 import os
+import sqlite3
 import subprocess
 import re
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -92,6 +94,45 @@ def generate_collection_name(base_name, version=None):
     return base_name
 
 
+def row_to_dict(cursor, row):
+    """sqlite3 row factory returning rows as dicts keyed by column name."""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class ThreadLocalSQLite:
+    """
+    Per-thread connections to one SQLite database file.
+    
+    sqlite3 connections cannot be shared between threads, so each thread
+    opens its own on first use; SQLite serializes writers across threads
+    and worker processes.
+    """
+    
+    def __init__(self, db_file, row_factory=None, on_connect=None):
+        """
+        Args:
+            db_file: Path to the database file
+            row_factory: Optional sqlite3 row factory, e.g. row_to_dict
+            on_connect: Optional callable run on each new connection (pragmas, functions)
+        """
+        self.db_file = Path(db_file)
+        self.row_factory = row_factory
+        self.on_connect = on_connect
+        self._local = threading.local()
+    
+    def connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opened in autocommit mode on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=10, isolation_level=None)
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            if self.on_connect is not None:
+                self.on_connect(conn)
+            self._local.conn = conn
+        return conn
+
+
 def setup_logging():
     """
     Configure logging for the application.
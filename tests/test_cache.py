@@ -0,0 +1,87 @@
+"""
+Unit tests for cache.py module
+"""
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the repository root to path; src modules use package-relative imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class TestQueryCache:
+    """Test the SQLite-backed QueryCache."""
+
+    def test_cache_key_accepts_any_k(self, tmp_path):
+        """Test that k values from the request body never break the cache key."""
+        from src.cache import QueryCache
+
+        cache = QueryCache(cache_dir=tmp_path)
+
+        for k in (3, 3.0, "3", -1, 2 ** 40, None):
+            cache.set("What is RAG?", {'answer': str(k)}, k=k)
+            assert cache.get("What is RAG?", k=k) == {'answer': str(k)}
+        assert cache._get_cache_key("q", k=3) != cache._get_cache_key("q", k=4)
+
+    def test_set_get_round_trip(self, tmp_path):
+        """Test that cached results are returned for the same query, version and k."""
+        from src.cache import QueryCache
+
+        cache = QueryCache(cache_dir=tmp_path)
+        result = {'answer': 'Retrieval augmented generation', 'sources': [{'page': 1}]}
+        cache.set("What is RAG?", result, version="1.0", k=5)
+
+        # Queries are normalized before hashing
+        assert cache.get("  what is rag?  ", version="1.0", k=5) == result
+        assert cache.get("What is RAG?", version="2.0", k=5) is None
+        assert cache.get("What is RAG?", version="1.0", k=3) is None
+        assert cache.stats()['entries'] == 1
+
+    def test_expired_entries_are_not_returned(self, tmp_path):
+        """Test that entries older than the TTL miss and are purged on the next write."""
+        from src.cache import QueryCache
+
+        cache = QueryCache(cache_dir=tmp_path, ttl=60)
+        with patch('src.cache.time.time', return_value=1000.0):
+            cache.set("old query", {'answer': 'old'})
+        with patch('src.cache.time.time', return_value=1061.0):
+            assert cache.get("old query") is None
+            cache.set("new query", {'answer': 'new'})
+            assert cache.get("new query") == {'answer': 'new'}
+
+        assert cache.stats()['entries'] == 1
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that the least recently read entry is evicted when the cache is full."""
+        from src.cache import QueryCache
+
+        cache = QueryCache(cache_dir=tmp_path, max_size=2)
+        with patch('src.cache.time.time', return_value=1000.0):
+            cache.set("first", {'answer': 1})
+        with patch('src.cache.time.time', return_value=1001.0):
+            cache.set("second", {'answer': 2})
+        with patch('src.cache.time.time', return_value=1002.0):
+            assert cache.get("first") == {'answer': 1}
+        with patch('src.cache.time.time', return_value=1003.0):
+            cache.set("third", {'answer': 3})
+
+        with patch('src.cache.time.time', return_value=1004.0):
+            assert cache.get("second") is None
+            assert cache.get("first") == {'answer': 1}
+            assert cache.get("third") == {'answer': 3}
+
+    def test_removes_legacy_json_files(self, tmp_path):
+        """Test that per-entry JSON files from the old file cache are deleted on start-up."""
+        from src.cache import QueryCache
+
+        legacy = tmp_path / "0123456789abcdef.json"
+        legacy.write_text('{"result": {}, "timestamp": 0}')
+        unrelated = tmp_path / "notes.txt"
+        unrelated.write_text("keep")
+
+        cache = QueryCache(cache_dir=tmp_path)
+
+        assert not legacy.exists()
+        assert unrelated.exists()
+        assert (tmp_path / "cache.db").exists()
+        assert cache.stats()['entries'] == 0
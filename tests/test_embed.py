@@ -8,11 +8,10 @@ from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 import sys
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+# Add the repository root to path; src modules use package-relative imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from embed import embed_file, embed_directory, detect_document_format
-from get_vector_db import get_vector_db
+from src.embed import embed_file, embed_directory, detect_document_format
 
 
 @pytest.fixture
@@ -51,38 +50,38 @@ class TestDocumentFormatDetection:
     
     def test_detect_pdf(self):
         """Test PDF format detection."""
-        from utils import detect_document_format
+        from src.utils import detect_document_format
         assert detect_document_format("test.pdf") == "pdf"
     
     def test_detect_html(self):
         """Test HTML format detection."""
-        from utils import detect_document_format
+        from src.utils import detect_document_format
         assert detect_document_format("test.html") == "html"
         assert detect_document_format("test.htm") == "html"
     
     def test_detect_txt(self):
         """Test TXT format detection."""
-        from utils import detect_document_format
+        from src.utils import detect_document_format
         assert detect_document_format("test.txt") == "txt"
     
     def test_detect_markdown(self):
         """Test Markdown format detection."""
-        from utils import detect_document_format
+        from src.utils import detect_document_format
         assert detect_document_format("test.md") == "md"
         assert detect_document_format("test.markdown") == "md"
     
     def test_detect_unknown(self):
         """Test unknown format detection."""
-        from utils import detect_document_format
+        from src.utils import detect_document_format
         assert detect_document_format("test.xyz") == "unknown"
 
 
 class TestEmbedFile:
     """Test embed_file function."""
     
-    @patch('embed.OllamaEmbeddings')
-    @patch('embed.Chroma')
-    @patch('embed.PyPDFLoader')
+    @patch('src.embed.get_document_embedding')
+    @patch('src.embed.Chroma')
+    @patch('src.embed.PyPDFLoader')
     def test_embed_pdf_new_collection(self, mock_loader, mock_chroma, mock_embeddings, temp_dir):
         """Test embedding a PDF file into a new collection."""
         # Setup mocks
@@ -90,7 +89,7 @@ class TestEmbedFile:
         mock_doc.page_content = "Test content"
         mock_doc.metadata = {}
         mock_loader_instance = Mock()
-        mock_loader_instance.load.return_value = [mock_doc]
+        mock_loader_instance.lazy_load.return_value = iter([mock_doc])
         mock_loader.return_value = mock_loader_instance
         
         mock_chroma_instance = Mock()
@@ -102,15 +101,16 @@ class TestEmbedFile:
         pdf_path.write_bytes(b"dummy pdf content")
         
         # Test
-        result = embed_file(str(pdf_path), overwrite=False)
+        with patch('src.embed.get_or_create_collection_helper', return_value=(None, False)):
+            result = embed_file(str(pdf_path), overwrite=False)
         
         # Verify
         mock_loader.assert_called_once()
         mock_chroma.from_documents.assert_called_once()
     
-    @patch('embed.OllamaEmbeddings')
-    @patch('embed.Chroma')
-    @patch('embed.TextLoader')
+    @patch('src.embed.get_document_embedding')
+    @patch('src.embed.Chroma')
+    @patch('src.embed.TextLoader')
     def test_embed_txt_incremental(self, mock_loader, mock_chroma, mock_embeddings, sample_text_file):
         """Test incremental embedding of a text file."""
         # Setup mocks
@@ -118,22 +118,88 @@ class TestEmbedFile:
         mock_doc.page_content = "Test content"
         mock_doc.metadata = {}
         mock_loader_instance = Mock()
-        mock_loader_instance.load.return_value = [mock_doc]
+        mock_loader_instance.lazy_load.return_value = iter([mock_doc])
         mock_loader.return_value = mock_loader_instance
         
         # Mock existing collection
         mock_db = Mock()
         mock_db._collection.count.return_value = 5  # Collection exists
+        mock_db._client.get_max_batch_size.return_value = 5461
+        mock_db.embeddings.embed_documents.return_value = [[0.1, 0.2]]
+        mock_db._collection.get.return_value = {'ids': []}
         mock_chroma_instance = Mock()
         mock_chroma.return_value = mock_db
         mock_chroma.from_documents.return_value = mock_chroma_instance
         
         # Mock get_or_create_collection to return existing collection
-        with patch('embed.get_or_create_collection_helper', return_value=(mock_db, True)):
+        with patch('src.embed.get_or_create_collection_helper', return_value=(mock_db, True)):
             result = embed_file(sample_text_file, overwrite=False)
             
-            # Verify add_documents was called (incremental update)
-            mock_db.add_documents.assert_called_once()
+            # Verify precomputed vectors were added (incremental update)
+            mock_db.embeddings.embed_documents.assert_called_once_with(["Test content"])
+            mock_db._collection.add.assert_called_once()
+            assert mock_db._collection.add.call_args.kwargs['embeddings'] == [[0.1, 0.2]]
+    
+    def test_bulk_add_skips_existing_chunks(self):
+        """Test that chunks already stored under their source and content hash are not re-embedded."""
+        import hashlib
+        from langchain_core.documents import Document
+        from src.embed import _bulk_add
+        
+        chunks = [
+            Document(page_content="old", metadata={'source_file': 'a.md'}),
+            Document(page_content="new", metadata={'source_file': 'a.md'}),
+            Document(page_content="new", metadata={'source_file': 'a.md'}),
+            Document(page_content="old", metadata={'source_file': 'b.md'}),
+        ]
+        old_id = hashlib.sha256(b"a.md\0old").hexdigest()
+        new_id = hashlib.sha256(b"a.md\0new").hexdigest()
+        other_id = hashlib.sha256(b"b.md\0old").hexdigest()
+        
+        mock_db = Mock()
+        mock_db._client.get_max_batch_size.return_value = 5461
+        mock_db._collection.get.return_value = {'ids': [old_id]}
+        mock_db.embeddings.embed_documents.return_value = [[0.1, 0.2], [0.3, 0.4]]
+        
+        _bulk_add(mock_db, chunks)
+        
+        mock_db._collection.get.assert_called_once_with(ids=[old_id, new_id, other_id], include=[])
+        # The same text from another file is kept, with that file's metadata
+        mock_db.embeddings.embed_documents.assert_called_once_with(["new", "old"])
+        add_kwargs = mock_db._collection.add.call_args.kwargs
+        assert add_kwargs['ids'] == [new_id, other_id]
+        assert add_kwargs['metadatas'][1] == {'source_file': 'b.md'}
+    
+    def test_load_html_strips_scripts(self, temp_dir):
+        """Test that the selectolax HTML loader keeps body text only."""
+        pytest.importorskip("selectolax")
+        from src.embed import _load_html
+        
+        html_path = Path(temp_dir) / "page.html"
+        html_path.write_text(
+            "<html><head><style>p {}</style></head>"
+            "<body><script>var x;</script><p>Hello &amp; welcome</p></body></html>"
+        )
+        
+        documents = list(_load_html(html_path))
+        
+        assert len(documents) == 1
+        assert documents[0].page_content == "Hello & welcome"
+        assert documents[0].metadata == {'source': str(html_path)}
+    
+    @patch('src.embed.get_chroma_client')
+    def test_overwrite_skips_delete_for_missing_collection(self, mock_get_client):
+        """Test that only existing collections are deleted before an overwrite."""
+        from src.embed import _delete_collection_if_exists
+        
+        mock_client = mock_get_client.return_value
+        mock_client.list_collections.return_value = ['docs']
+        
+        assert _delete_collection_if_exists('missing') is False
+        mock_client.delete_collection.assert_not_called()
+        
+        assert _delete_collection_if_exists('docs') is True
+        mock_client.delete_collection.assert_called_once_with('docs')
     
     def test_embed_file_not_found(self):
         """Test embedding a non-existent file."""
@@ -152,8 +218,10 @@ class TestEmbedFile:
 class TestEmbedDirectory:
     """Test embed_directory function."""
     
-    @patch('embed.embed_file')
-    def test_embed_directory_success(self, mock_embed_file, temp_dir):
+    @patch('src.embed.get_or_create_collection_helper')
+    @patch('src.embed.get_document_embedding')
+    @patch('src.embed.embed_file')
+    def test_embed_directory_success(self, mock_embed_file, mock_get_embedding, mock_get_collection, temp_dir):
         """Test embedding a directory with multiple files."""
         # Create test files
         (Path(temp_dir) / "file1.txt").write_text("Content 1")
@@ -161,6 +229,8 @@ class TestEmbedDirectory:
         (Path(temp_dir) / "file3.md").write_text("Content 3")
         
         mock_embed_file.return_value = Mock()
+        mock_db = Mock()
+        mock_get_collection.return_value = (mock_db, True)
         
         results = embed_directory(str(temp_dir))
         
@@ -168,6 +238,47 @@ class TestEmbedDirectory:
         assert results['success'] == 3
         assert results['failed'] == 0
         assert mock_embed_file.call_count == 3
+        
+        # Embedding model and collection are shared by every file
+        mock_get_embedding.assert_called_once()
+        mock_get_collection.assert_called_once()
+        for call in mock_embed_file.call_args_list:
+            assert call.kwargs['embedding'] is mock_get_embedding.return_value
+            assert call.kwargs['db'] is mock_db
+    
+    @patch('src.embed.get_or_create_collection_helper')
+    @patch('src.embed.get_document_embedding')
+    @patch('src.embed.embed_file')
+    def test_embed_directory_split_processes(self, mock_embed_file, mock_get_embedding, mock_get_collection, temp_dir):
+        """Test that files split on worker processes reach embed_file as chunks."""
+        (Path(temp_dir) / "file1.txt").write_text("Content 1")
+        (Path(temp_dir) / "file2.md").write_text("Content 2")
+        
+        mock_get_collection.return_value = (Mock(), True)
+        
+        from concurrent.futures import ProcessPoolExecutor
+        with patch('src.embed.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as mock_pool:
+            results = embed_directory(str(temp_dir), split_processes=1)
+        
+        # Workers are spawned, never forked from the threaded parent
+        assert mock_pool.call_args.kwargs['mp_context'].get_start_method() == 'spawn'
+        assert results['success'] == 2
+        contents = sorted(call.kwargs['chunks'][0].page_content for call in mock_embed_file.call_args_list)
+        assert contents == ["Content 1", "Content 2"]
+    
+    def test_find_files_single_walk(self, temp_dir):
+        """Test that nested files are matched by extension, case-insensitively."""
+        from src.embed import _find_files
+        
+        nested = Path(temp_dir) / "docs" / "api"
+        nested.mkdir(parents=True)
+        (Path(temp_dir) / "readme.md").write_text("a")
+        (nested / "index.HTML").write_text("b")
+        (nested / "script.py").write_text("c")
+        
+        files = _find_files(temp_dir)
+        
+        assert sorted(path.name for path in files) == ["index.HTML", "readme.md"]
     
     def test_embed_directory_not_directory(self, temp_dir):
         """Test embedding a file path that's not a directory."""
@@ -181,22 +292,22 @@ class TestEmbedDirectory:
 class TestVersionHandling:
     """Test version handling in embedding."""
     
-    @patch('embed.OllamaEmbeddings')
-    @patch('embed.Chroma')
-    @patch('embed.TextLoader')
+    @patch('src.embed.get_document_embedding')
+    @patch('src.embed.Chroma')
+    @patch('src.embed.TextLoader')
     def test_embed_with_version(self, mock_loader, mock_chroma, mock_embeddings, sample_text_file):
         """Test embedding with version parameter."""
         mock_doc = Mock()
         mock_doc.page_content = "Test content"
         mock_doc.metadata = {}
         mock_loader_instance = Mock()
-        mock_loader_instance.load.return_value = [mock_doc]
+        mock_loader_instance.lazy_load.return_value = iter([mock_doc])
         mock_loader.return_value = mock_loader_instance
         
         mock_chroma_instance = Mock()
         mock_chroma.from_documents.return_value = mock_chroma_instance
         
-        with patch('embed.get_or_create_collection_helper', return_value=(None, False)):
+        with patch('src.embed.get_or_create_collection_helper', return_value=(None, False)):
             result = embed_file(sample_text_file, version="1.2.3")
             
             # Verify collection name includes version
@@ -215,7 +326,7 @@ class TestChunking:
         file_path.write_text(large_content)
         
         from langchain_community.document_loaders import TextLoader
-        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
         
         loader = TextLoader(str(file_path))
         documents = loader.load()
@@ -231,17 +342,25 @@ class TestChunking:
         # Each chunk should be within reasonable size
         for chunk in chunks:
             assert len(chunk.page_content) <= 1200  # chunk_size + some margin
+    
+    def test_splitter_is_reused(self):
+        """Test that the text splitter is built once per chunk configuration."""
+        from src.embed import _get_splitter
+        
+        assert _get_splitter() is _get_splitter()
+        assert _get_splitter(500, 50) is not _get_splitter()
+        assert _get_splitter(500, 50)._chunk_size == 500
 
 
 class TestConfluenceEmbedding:
     """Test Confluence page embedding functionality."""
     
-    @patch('embed.ConfluenceIntegration')
-    @patch('embed.OllamaEmbeddings')
-    @patch('embed.Chroma')
+    @patch('src.embed.ConfluenceIntegration')
+    @patch('src.embed.get_document_embedding')
+    @patch('src.embed.Chroma')
     def test_embed_confluence_page_success(self, mock_chroma, mock_embeddings, mock_confluence_class):
         """Test successfully embedding a Confluence page."""
-        from embed import embed_confluence_page
+        from src.embed import embed_confluence_page
         
         # Mock Confluence integration
         mock_confluence = Mock()
@@ -274,7 +393,7 @@ class TestConfluenceEmbedding:
         mock_chroma.from_documents.return_value = mock_chroma_instance
         
         # Mock get_or_create_collection_helper
-        with patch('embed.get_or_create_collection_helper', return_value=(None, False)):
+        with patch('src.embed.get_or_create_collection_helper', return_value=(None, False)):
             result = embed_confluence_page(
                 page_id="123456",
                 confluence_config={
@@ -288,10 +407,10 @@ class TestConfluenceEmbedding:
             mock_confluence.fetch_page.assert_called_once_with("123456", expand="body.storage,space,version")
             mock_chroma.from_documents.assert_called_once()
     
-    @patch('embed.ConfluenceIntegration')
+    @patch('src.embed.ConfluenceIntegration')
     def test_embed_confluence_page_not_found(self, mock_confluence_class):
         """Test embedding when page is not found."""
-        from embed import embed_confluence_page
+        from src.embed import embed_confluence_page
         
         mock_confluence = Mock()
         mock_confluence.fetch_page.return_value = None
@@ -307,10 +426,10 @@ class TestConfluenceEmbedding:
                 }
             )
     
-    @patch('embed.ConfluenceIntegration')
+    @patch('src.embed.ConfluenceIntegration')
     def test_embed_confluence_page_no_content(self, mock_confluence_class):
         """Test embedding when page has no content."""
-        from embed import embed_confluence_page
+        from src.embed import embed_confluence_page
         
         mock_confluence = Mock()
         mock_page = {
@@ -332,13 +451,24 @@ class TestConfluenceEmbedding:
                 }
             )
     
-    @patch('embed.embed_confluence_page')
-    def test_embed_confluence_pages_multiple(self, mock_embed_page):
+    @patch('src.embed._bulk_add')
+    @patch('src.embed.get_or_create_collection_helper')
+    @patch('src.embed.get_document_embedding')
+    @patch('src.embed.ConfluenceIntegration')
+    def test_embed_confluence_pages_multiple(self, mock_confluence_class, mock_get_embedding,
+                                             mock_get_collection, mock_bulk_add):
         """Test embedding multiple Confluence pages."""
-        from embed import embed_confluence_pages
-        
+        from src.embed import embed_confluence_pages
+        
+        mock_confluence = mock_confluence_class.return_value
+        mock_confluence.fetch_pages.side_effect = lambda page_ids, expand: [
+            {'id': page_id, 'title': page_id} for page_id in page_ids
+        ]
+        mock_confluence.extract_page_id_from_url.side_effect = lambda page_id: page_id
+        mock_confluence.get_page_content.side_effect = lambda page: f"Content of {page['id']}"
+        mock_confluence.get_page_metadata.side_effect = lambda page: {'page_id': page['id']}
         mock_db = Mock()
-        mock_embed_page.return_value = mock_db
+        mock_get_collection.return_value = (mock_db, True)
         
         confluence_config = {
             'url': 'https://test.atlassian.net',
@@ -353,16 +483,33 @@ class TestConfluenceEmbedding:
         
         assert results['success'] == 3
         assert results['failed'] == 0
-        assert mock_embed_page.call_count == 3
+        mock_confluence.fetch_pages.assert_called_once_with(["123", "456", "789"], expand="body.storage,space,version")
+        
+        # One connection and one buffered write for the whole batch
+        mock_confluence_class.assert_called_once()
+        mock_bulk_add.assert_called_once()
+        db, chunks = mock_bulk_add.call_args.args
+        assert db is mock_db
+        assert sorted(chunk.metadata['page_id'] for chunk in chunks) == ["123", "456", "789"]
     
-    @patch('embed.embed_confluence_page')
-    def test_embed_confluence_pages_with_failures(self, mock_embed_page):
+    @patch('src.embed._bulk_add')
+    @patch('src.embed.get_or_create_collection_helper')
+    @patch('src.embed.get_document_embedding')
+    @patch('src.embed.ConfluenceIntegration')
+    def test_embed_confluence_pages_with_failures(self, mock_confluence_class, mock_get_embedding,
+                                                  mock_get_collection, mock_bulk_add):
         """Test embedding multiple pages with some failures."""
-        from embed import embed_confluence_pages
-        
-        mock_db = Mock()
-        # First succeeds, second fails, third succeeds
-        mock_embed_page.side_effect = [mock_db, ValueError("Page not found"), mock_db]
+        from src.embed import embed_confluence_pages
+        
+        # fetch_pages leaves out pages it could not fetch
+        mock_confluence = mock_confluence_class.return_value
+        mock_confluence.fetch_pages.side_effect = lambda page_ids, expand: [
+            {'id': page_id, 'title': page_id} for page_id in page_ids if page_id != "456"
+        ]
+        mock_confluence.extract_page_id_from_url.side_effect = lambda page_id: page_id
+        mock_confluence.get_page_content.return_value = 'Content'
+        mock_confluence.get_page_metadata.side_effect = lambda page: {'page_id': page['id']}
+        mock_get_collection.return_value = (Mock(), True)
         
         confluence_config = {
             'url': 'https://test.atlassian.net',
@@ -380,12 +527,12 @@ class TestConfluenceEmbedding:
         assert len(results['errors']) == 1
         assert results['errors'][0]['page_id'] == "456"
     
-    @patch('embed.ConfluenceIntegration')
-    @patch('embed.OllamaEmbeddings')
-    @patch('embed.Chroma')
+    @patch('src.embed.ConfluenceIntegration')
+    @patch('src.embed.get_document_embedding')
+    @patch('src.embed.Chroma')
     def test_embed_confluence_page_with_version(self, mock_chroma, mock_embeddings, mock_confluence_class):
         """Test embedding Confluence page with version."""
-        from embed import embed_confluence_page
+        from src.embed import embed_confluence_page
         
         mock_confluence = Mock()
         mock_page = {
@@ -408,7 +555,7 @@ class TestConfluenceEmbedding:
         mock_chroma_instance = Mock()
         mock_chroma.from_documents.return_value = mock_chroma_instance
         
-        with patch('embed.get_or_create_collection_helper', return_value=(None, False)):
+        with patch('src.embed.get_or_create_collection_helper', return_value=(None, False)):
             result = embed_confluence_page(
                 page_id="123456",
                 confluence_config={
@@ -422,4 +569,3 @@ class TestConfluenceEmbedding:
             # Verify collection name includes version
             call_args = mock_chroma.from_documents.call_args
             assert "1.2.3" in call_args.kwargs['collection_name']
-
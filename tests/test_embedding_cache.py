@@ -0,0 +1,70 @@
+"""
+Unit tests for embedding_cache.py module
+"""
+import sys
+from pathlib import Path
+
+from langchain_core.embeddings import FakeEmbeddings
+from langchain_classic.embeddings import CacheBackedEmbeddings
+
+# Add the repository root to path; src modules use package-relative imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class TestEmbeddingCacheStore:
+    """Test EmbeddingCacheStore counters and size bound."""
+
+    def test_counts_hits_and_misses(self, tmp_path):
+        """Test that repeated texts are served from the cache."""
+        from src.embedding_cache import EmbeddingCacheStore
+
+        store = EmbeddingCacheStore(cache_dir=tmp_path)
+        embeddings = CacheBackedEmbeddings.from_bytes_store(FakeEmbeddings(size=4), store, namespace='test_')
+
+        first = embeddings.embed_documents(['alpha', 'beta'])
+        second = embeddings.embed_documents(['alpha', 'gamma'])
+
+        assert second[0] == first[0]
+        assert store.hits == 1
+        assert store.misses == 3
+
+    def test_prunes_oldest_entries_over_limit(self, tmp_path):
+        """Test that the store shrinks below its limit once exceeded."""
+        from src.embedding_cache import EmbeddingCacheStore
+
+        store = EmbeddingCacheStore(cache_dir=tmp_path, max_size_mb=1)
+        store.mset([(f'key{i}', b'x' * 1024) for i in range(1100)])
+
+        assert store.stats()['size_mb'] <= 0.9
+
+
+class TestCachedQueryEmbeddings:
+    """Test the in-memory query embedding cache."""
+
+    def test_repeated_query_is_embedded_once(self):
+        """Test that the same question is only sent to the model once per namespace."""
+        from src.embedding_cache import CachedQueryEmbeddings, QueryEmbeddingCache
+
+        cache = QueryEmbeddingCache(max_size=2)
+        embeddings = CachedQueryEmbeddings(FakeEmbeddings(size=4), 'ns_', cache)
+        other_model = CachedQueryEmbeddings(FakeEmbeddings(size=4), 'other_', cache)
+
+        first = embeddings.embed_query('question')
+        assert embeddings.embed_query('question') == first
+        assert other_model.embed_query('question') != first
+        assert cache.hits == 1
+        assert cache.misses == 2
+
+    def test_evicts_least_recently_used(self):
+        """Test that the cache keeps only max_size queries."""
+        from src.embedding_cache import CachedQueryEmbeddings, QueryEmbeddingCache
+
+        cache = QueryEmbeddingCache(max_size=2)
+        embeddings = CachedQueryEmbeddings(FakeEmbeddings(size=4), 'ns_', cache)
+        embeddings.embed_query('a')
+        embeddings.embed_query('b')
+        embeddings.embed_query('a')  # Touch 'a' so 'b' is evicted next
+        embeddings.embed_query('c')
+
+        assert cache.get(('ns_', 'a')) is not None
+        assert cache.get(('ns_', 'b')) is None
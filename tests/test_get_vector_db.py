@@ -0,0 +1,46 @@
+"""
+Unit tests for get_vector_db.py module
+"""
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the repository root to path; src modules use package-relative imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class TestSharedChromaClient:
+    """Test shared ChromaDB client reuse."""
+
+    @patch('src.get_vector_db.chromadb.PersistentClient')
+    def test_client_created_once(self, mock_client_class):
+        """Test that repeated calls reuse a single persistent client."""
+        from src import get_vector_db
+
+        get_vector_db._chroma_client = None
+        try:
+            first = get_vector_db.get_chroma_client()
+            second = get_vector_db.get_chroma_client()
+
+            assert first is second
+            mock_client_class.assert_called_once_with(path=get_vector_db.CHROMA_PATH)
+        finally:
+            get_vector_db._chroma_client = None
+
+    @patch('src.get_vector_db.chromadb.PersistentClient')
+    def test_collection_handles_use_shared_client(self, mock_client_class):
+        """Test that collection handles are opened on the shared client."""
+        from src import get_vector_db
+
+        get_vector_db._chroma_client = None
+        try:
+            with patch('src.get_vector_db.Chroma') as mock_chroma:
+                db, exists = get_vector_db.get_or_create_collection('docs', object(), version='1.0')
+
+            assert exists is True
+            assert db is mock_chroma.return_value
+            assert mock_chroma.call_args.kwargs['collection_name'] == 'docs-v1.0'
+            assert mock_chroma.call_args.kwargs['client'] is mock_client_class.return_value
+            mock_client_class.assert_called_once()
+        finally:
+            get_vector_db._chroma_client = None
@@ -0,0 +1,98 @@
+"""
+Unit tests for query_history.py module
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the repository root to path; src modules use package-relative imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def history_dir(tmp_path, monkeypatch):
+    """Point the history store at a temporary directory."""
+    from src import query_history
+
+    monkeypatch.setattr(query_history, 'HISTORY_DIR', tmp_path)
+    monkeypatch.setattr(query_history, 'HISTORY_DB', tmp_path / 'queries.db')
+    monkeypatch.setattr(query_history, 'HISTORY_FILE', tmp_path / 'queries.json')
+    monkeypatch.setattr(query_history, 'FAVORITES_FILE', tmp_path / 'favorites.json')
+    return tmp_path
+
+
+class TestQueryHistory:
+    """Test the SQLite-backed QueryHistory."""
+
+    def test_get_history_offset_and_order(self, history_dir):
+        """Test that pages are taken oldest first and returned newest first."""
+        from src.query_history import QueryHistory
+
+        history = QueryHistory()
+        for i in range(5):
+            history.add_query(f"query {i}", answer=f"answer {i}", version="1.0", source_count=i)
+
+        assert [entry['query'] for entry in history.get_history()] == [
+            "query 4", "query 3", "query 2", "query 1", "query 0"
+        ]
+        assert [entry['query'] for entry in history.get_history(limit=2, offset=1)] == ["query 2", "query 1"]
+        assert history.get_history(limit=10, offset=5) == []
+
+        entry = history.get_history(limit=1)[0]
+        assert entry['answer'] == "answer 0"
+        assert entry['version'] == "1.0"
+        assert history.count() == 5
+
+    def test_history_keeps_last_max_entries(self, history_dir, monkeypatch):
+        """Test that only the newest MAX_HISTORY entries are kept."""
+        from src import query_history
+
+        monkeypatch.setattr(query_history, 'MAX_HISTORY', 3)
+        history = query_history.QueryHistory()
+        for i in range(5):
+            history.add_query(f"query {i}")
+
+        assert [entry['query'] for entry in history.get_history()] == ["query 4", "query 3", "query 2"]
+
+    def test_search_history_newest_matches_first(self, history_dir):
+        """Test that search is case-insensitive and returns the newest matches up to the limit."""
+        from src.query_history import QueryHistory
+
+        history = QueryHistory()
+        for query in ["Install ÄPI", "configure api keys", "deploy", "API limits", "api errors"]:
+            history.add_query(query)
+
+        assert [entry['query'] for entry in history.search_history("API")] == [
+            "api errors", "API limits", "configure api keys"
+        ]
+        assert [entry['query'] for entry in history.search_history("api", limit=2)] == [
+            "api errors", "API limits"
+        ]
+        # Non-ASCII text is lowercased the same way as the search term
+        assert [entry['query'] for entry in history.search_history("äpi")] == ["Install ÄPI"]
+        assert history.search_history("missing") == []
+
+    def test_imports_legacy_json_once(self, history_dir):
+        """Test that the legacy queries.json is imported and renamed to .json.bak."""
+        from src.query_history import QueryHistory
+
+        legacy = [
+            {'query': 'first', 'timestamp': '2024-01-01T00:00:00', 'answer': 'a', 'version': '1.0',
+             'response_time': 0.5, 'source_count': 2},
+            {'query': 'second', 'timestamp': '2024-01-02T00:00:00'},
+        ]
+        (history_dir / 'queries.json').write_text(json.dumps(legacy))
+
+        history = QueryHistory()
+
+        assert not (history_dir / 'queries.json').exists()
+        assert (history_dir / 'queries.json.bak').exists()
+        entries = history.get_history()
+        assert [entry['query'] for entry in entries] == ['second', 'first']
+        assert entries[1]['response_time'] == 0.5
+        assert entries[0]['source_count'] == 0
+
+        # A second start-up finds no legacy file and keeps the imported entries
+        assert QueryHistory().count() == 2
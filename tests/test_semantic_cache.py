@@ -0,0 +1,95 @@
+"""
+Unit tests for semantic_cache.py module
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add the repository root to path; src modules use package-relative imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class TestSemanticCache:
+    """Test SemanticCache lookups and eviction."""
+
+    def test_hit_on_similar_embedding(self):
+        """Test that a near-identical embedding returns the cached response."""
+        from src.semantic_cache import SemanticCache
+
+        cache = SemanticCache(max_size=4, threshold=0.95)
+        cache.set([1.0, 0.0, 0.0], {'answer': 'A'}, 'ctx')
+
+        assert cache.get([0.99, 0.05, 0.0], 'ctx') == {'answer': 'A'}
+        assert cache.hits == 1
+
+    def test_miss_below_threshold(self):
+        """Test that dissimilar embeddings do not match."""
+        from src.semantic_cache import SemanticCache
+
+        cache = SemanticCache(max_size=4, threshold=0.95)
+        cache.set([1.0, 0.0, 0.0], {'answer': 'A'}, 'ctx')
+
+        assert cache.get([0.0, 1.0, 0.0], 'ctx') is None
+        assert cache.misses == 1
+
+    def test_context_isolation(self):
+        """Test that entries only match lookups with the same context."""
+        from src.semantic_cache import SemanticCache
+
+        cache = SemanticCache(max_size=4, threshold=0.95)
+        cache.set([1.0, 0.0], {'answer': 'v1'}, 'version-1')
+
+        assert cache.get([1.0, 0.0], 'version-2') is None
+        assert cache.get([1.0, 0.0], 'version-1') == {'answer': 'v1'}
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        from src.semantic_cache import SemanticCache
+
+        cache = SemanticCache(max_size=2, threshold=0.99)
+        cache.set([1.0, 0.0, 0.0], {'answer': 'x'})
+        cache.set([0.0, 1.0, 0.0], {'answer': 'y'})
+        cache.get([1.0, 0.0, 0.0])  # Touch 'x' so 'y' becomes least recently used
+        cache.set([0.0, 0.0, 1.0], {'answer': 'z'})
+
+        assert cache.get([1.0, 0.0, 0.0]) == {'answer': 'x'}
+        assert cache.get([0.0, 1.0, 0.0]) is None
+        assert cache.get([0.0, 0.0, 1.0]) == {'answer': 'z'}
+
+    def test_clear(self):
+        """Test clearing the cache."""
+        from src.semantic_cache import SemanticCache
+
+        cache = SemanticCache(max_size=2)
+        cache.set(np.ones(3), {'answer': 'x'})
+        cache.clear()
+
+        assert cache.stats()['entries'] == 0
+        assert cache.get(np.ones(3)) is None
+
+    def test_expired_entries_miss(self, monkeypatch):
+        """Test that entries older than the TTL are not returned."""
+        import src.semantic_cache as semantic_cache
+        from src.semantic_cache import SemanticCache
+
+        now = [1000.0]
+        monkeypatch.setattr(semantic_cache.time, 'monotonic', lambda: now[0])
+        cache = SemanticCache(max_size=2, ttl=60)
+        cache.set([1.0, 0.0], {'answer': 'x'})
+
+        now[0] += 30
+        assert cache.get([1.0, 0.0]) == {'answer': 'x'}
+        now[0] += 31
+        assert cache.get([1.0, 0.0]) is None
+
+    def test_int8_quantized_keys(self):
+        """Test that int8-quantized keys give the same hits and misses."""
+        from src.semantic_cache import SemanticCache
+
+        cache = SemanticCache(max_size=4, threshold=0.95, quantize=True)
+        cache.set([1.0, 0.0, 0.0], {'answer': 'A'}, 'ctx')
+
+        assert cache._keys.dtype == np.int8
+        assert cache.get([0.99, 0.05, 0.0], 'ctx') == {'answer': 'A'}
+        assert cache.get([0.0, 1.0, 0.0], 'ctx') is None
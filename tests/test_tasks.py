@@ -0,0 +1,76 @@
+"""
+Unit tests for tasks.py module
+"""
+import sys
+import threading
+from pathlib import Path
+
+# Add the repository root to path; src modules use package-relative imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def _wait(manager, task_id, timeout=5):
+    """Poll until a task has finished."""
+    import time
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        task = manager.get(task_id)
+        if task['status'] in ('completed', 'failed'):
+            return task
+        time.sleep(0.01)
+    raise AssertionError(f"Task {task_id} did not finish")
+
+
+class TestTaskManager:
+    """Test TaskManager status tracking."""
+
+    def test_records_result_and_error(self, tmp_path):
+        """Test that completed and failed tasks report their outcome."""
+        from src.tasks import TaskManager
+
+        def fail():
+            raise ValueError('boom')
+
+        manager = TaskManager(max_workers=2, db_file=tmp_path / 'tasks.db')
+        ok_id = manager.submit('embed', lambda x: x * 2, 21)
+        fail_id = manager.submit('embed', fail)
+
+        ok = _wait(manager, ok_id)
+        failed = _wait(manager, fail_id)
+
+        assert ok['status'] == 'completed' and ok['result'] == 42
+        assert failed['status'] == 'failed' and failed['error'] == 'boom'
+        assert manager.get('unknown') is None
+
+    def test_prunes_only_finished_tasks(self, tmp_path):
+        """Test that old finished tasks are forgotten but running ones are kept."""
+        from src.tasks import TaskManager
+
+        release = threading.Event()
+        manager = TaskManager(max_workers=2, history_size=2, db_file=tmp_path / 'tasks.db')
+        running_id = manager.submit('embed', release.wait)
+        try:
+            first_id = manager.submit('embed', lambda: None)
+            _wait(manager, first_id)
+            second_id = manager.submit('embed', lambda: None)
+
+            assert manager.get(running_id)['status'] in ('pending', 'running')
+            assert manager.get(first_id) is None
+            assert manager.get(second_id) is not None
+        finally:
+            release.set()
+
+    def test_status_shared_between_managers(self, tmp_path):
+        """Test that a task submitted by one worker process can be polled from another."""
+        from src.tasks import TaskManager
+
+        db_file = tmp_path / 'tasks.db'
+        accepting = TaskManager(max_workers=1, db_file=db_file)
+        polling = TaskManager(max_workers=1, db_file=db_file)
+
+        task_id = accepting.submit('embed-batch', lambda: {'success': 3, 'failed': 0})
+        _wait(accepting, task_id)
+
+        task = polling.get(task_id)
+        assert task['type'] == 'embed-batch'
+        assert task['result'] == {'success': 3, 'failed': 0}
@@ -75,3 +75,37 @@ class TestCollectionNaming:
         name = generate_collection_name("test-collection")
         assert name == "test-collection"
 
+
+
+class TestThreadLocalSQLite:
+    """Test per-thread SQLite connections."""
+    
+    def test_connection_per_thread(self, tmp_path):
+        """Test that each thread reuses its own connection."""
+        import threading
+        from utils import ThreadLocalSQLite
+        
+        db = ThreadLocalSQLite(tmp_path / "test.db")
+        other = []
+        thread = threading.Thread(target=lambda: other.append(db.connect()))
+        thread.start()
+        thread.join()
+        
+        assert db.connect() is db.connect()
+        assert other[0] is not db.connect()
+    
+    def test_row_factory_and_on_connect(self, tmp_path):
+        """Test that new connections get the row factory and setup callback."""
+        from utils import ThreadLocalSQLite, row_to_dict
+        
+        setup = Mock()
+        db = ThreadLocalSQLite(tmp_path / "test.db", row_factory=row_to_dict, on_connect=setup)
+        conn = db.connect()
+        db.connect()
+        
+        setup.assert_called_once_with(conn)
+        assert conn.execute("SELECT 1 AS one, 'a' AS name").fetchone() == {'one': 1, 'name': 'a'}
+        # Autocommit mode: statements are not held in an implicit transaction
+        conn.execute("CREATE TABLE t (x)")
+        conn.execute("INSERT INTO t VALUES (1)")
+        assert not conn.in_transaction
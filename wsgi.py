@@ -0,0 +1,13 @@
+"""
+WSGI Entry Point
+Exposes the Flask application for production WSGI servers.
+
+Usage:
+    gunicorn --workers 4 --worker-class gthread --threads 8 --keep-alive 30 --preload wsgi:application
+"""
+from src.app import app
+
+# Conventional WSGI name; ``wsgi:app`` keeps working as well
+application = app
+
+__all__ = ['app', 'application']